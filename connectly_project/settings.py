@@ -85,7 +85,13 @@ SOCIALACCOUNT_PROVIDERS = {
 
 
 MIDDLEWARE = [
+    'posts.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    # Compresses other responses; cached feed pages arrive precompressed
+    # (posts/compression.py) and are passed through untouched
+    'django.middleware.gzip.GZipMiddleware',
+    # Sends safe-method requests to DATABASE_READ_ALIASES (replica / read)
+    'posts.db_routing.ReadOnlyRequestMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'allauth.account.middleware.AccountMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -96,6 +102,49 @@ MIDDLEWARE = [
     
 ]
 
+# Token -> user and role lookups are cached (posts/authentication.py):
+# shared cache for AUTH_CACHE_TIMEOUT, per-process LRU for AUTH_CACHE_LOCAL_TIMEOUT
+AUTH_CACHE_TIMEOUT = 60 * 5
+AUTH_CACHE_LOCAL_TIMEOUT = 30
+AUTH_CACHE_LOCAL_MAX_SIZE = 2048
+
+# 'top' feed ranking (posts/ranking.py): score = (likes + w * comments) / (age_h + 2) ** gravity
+ENGAGEMENT_COMMENT_WEIGHT = 2.0
+ENGAGEMENT_GRAVITY = 1.8
+ENGAGEMENT_SCORE_WINDOW_DAYS = 7
+
+# Feed page compression (posts/compression.py); brotli is used when installed
+RESPONSE_GZIP_LEVEL = 6
+RESPONSE_BROTLI_QUALITY = 5
+
+# orjson-backed JSON rendering when orjson is installed (posts/renderers.py)
+REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': [
+        'posts.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+}
+
+# Write-behind like buffering for hot posts (posts/like_buffer.py):
+# 'memory' (single process, flushed by a thread), 'redis', or unset for direct writes
+LIKE_BUFFER_BACKEND = os.getenv('LIKE_BUFFER_BACKEND') or None
+LIKE_BUFFER_REDIS_ALIAS = 'shared'
+LIKE_BUFFER_FLUSH_INTERVAL = 2
+
+# Background tasks for non-critical side effects (posts/tasks.py):
+# 'immediate' (inline), 'thread' (in-process worker) or 'db' (run_task_worker)
+TASK_QUEUE_BACKEND = os.getenv('TASK_QUEUE_BACKEND') or 'immediate'
+TASK_MAX_ATTEMPTS = 3
+TASK_RETRY_BACKOFF = 2  # seconds, doubled per attempt
+TASK_VISIBILITY_TIMEOUT = 300  # a claimed task runs again if its worker is gone this long
+TASK_POLL_INTERVAL = 1
+
+# Maximum number of ids accepted by the bulk like/follow endpoints
+BULK_MAX_ITEMS = 100
+
+# Fraction of requests that get Server-Timing headers and a metrics log line
+REQUEST_METRICS_SAMPLE_RATE = float(os.getenv('REQUEST_METRICS_SAMPLE_RATE', '0.05'))
+
 REST_AUTH_REGISTER_SERIALIZERS = {
     'SIGNUP_FIELDS': {
         'username': {
@@ -140,8 +189,70 @@ DATABASES = {
     }
 }
 
+# SQLITE_PROFILE=performance: WAL journaling and tuned pragmas on every
+# connection, IMMEDIATE write transactions with a busy timeout (one writer at
+# a time, no lock-upgrade deadlocks), and a read-only 'read' alias that
+# GET/HEAD requests read from (posts/db_routing.py), so feed reads don't
+# queue behind like/comment writes.
+SQLITE_PROFILE = os.getenv('SQLITE_PROFILE', '')
+SQLITE_READ_PRAGMAS = (
+    'PRAGMA synchronous=NORMAL;'
+    'PRAGMA mmap_size=268435456;'  # 256 MB
+    'PRAGMA cache_size=-65536;'  # 64 MB
+    'PRAGMA temp_store=MEMORY;'
+)
+if SQLITE_PROFILE == 'performance':
+    DATABASES['default'].update({
+        'CONN_MAX_AGE': 600,
+        'OPTIONS': {
+            'init_command': 'PRAGMA journal_mode=WAL;' + SQLITE_READ_PRAGMAS,
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,  # busy timeout, seconds
+        },
+    })
+    DATABASES['read'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': f"file:{DATABASES['default']['NAME']}?mode=ro",
+        'CONN_MAX_AGE': 600,
+        'OPTIONS': {'uri': True, 'init_command': SQLITE_READ_PRAGMAS, 'timeout': 20},
+        'TEST': {'MIRROR': 'default'},
+    }
+
+# REPLICA_DATABASE_PATH=/path/to/replica.sqlite3 adds a 'replica' alias that
+# GET traffic reads from (posts/db_routing.py), refreshed from the primary by
+# `manage.py sync_replica --loop`. Clients that just wrote are pinned to
+# 'default' for REPLICA_PIN_SECONDS so they see their own writes.
+REPLICA_DATABASE_PATH = os.getenv('REPLICA_DATABASE_PATH')
+REPLICA_PIN_SECONDS = 10
+REPLICA_SYNC_INTERVAL = 5
+if REPLICA_DATABASE_PATH:
+    DATABASES['replica'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': f"file:{REPLICA_DATABASE_PATH}?mode=ro",
+        'CONN_MAX_AGE': 600,
+        'OPTIONS': {'uri': True, 'init_command': SQLITE_READ_PRAGMAS, 'timeout': 20},
+        'TEST': {'MIRROR': 'default'},
+    }
+
+# Where safe-method requests read from; the replica wins over the same-file alias
+DATABASE_READ_ALIASES = ['replica'] if 'replica' in DATABASES else ['read'] if 'read' in DATABASES else []
+if DATABASE_READ_ALIASES:
+    DATABASE_ROUTERS = ['posts.db_routing.ReadWriteRouter']
+
+# 'default' keeps a short-lived per-process copy of hot keys (feed pages,
+# feed generations) in front of the shared Redis cache and falls back to
+# local memory while Redis is unreachable (posts/cache_backends.py).
 CACHES = {
     "default": {
+        "BACKEND": "posts.cache_backends.TieredCache",
+        "OPTIONS": {
+            "L2": "shared",
+            "L1_MAX_ENTRIES": 1000,
+            "L1_TIMEOUT": 2,  # seconds another process may serve a stale value
+            "RETRY_AFTER": 5,
+        }
+    },
+    "shared": {
         "BACKEND": "django_redis.cache.RedisCache",
         "LOCATION": "redis://127.0.0.1:6379/1",  # <- Connects to Redis on port 6379
         "OPTIONS": {
@@ -149,6 +260,27 @@ CACHES = {
         }
     }
 }
+# Feed pages are invalidated through generation counters (posts/feed_cache.py),
+# so they can live much longer than a plain TTL cache would allow.
+FEED_CACHE_TIMEOUT = 60 * 60 * 6
+# A page that is expired or one generation behind is still served for this
+# long while one request rebuilds it (posts/feed_cache.get_or_rebuild)
+FEED_CACHE_STALE_SECONDS = 60
+FEED_REBUILD_LOCK_SECONDS = 10
+# XFetch early-refresh aggressiveness; 0 disables early refresh
+FEED_XFETCH_BETA = 1.0
+
+# Number of latest comments embedded per post in feed/list responses
+FEED_EMBEDDED_COMMENTS = 3
+
+# Fan-out-on-write timelines for the 'followed' feed (posts/timeline.py).
+# 'db', 'redis' or unset to build the feed at read time.
+FEED_TIMELINE_BACKEND = os.getenv('FEED_TIMELINE_BACKEND') or None
+FEED_TIMELINE_REDIS_ALIAS = 'shared'
+FEED_TIMELINE_MAX_LENGTH = 800
+# Authors with more followers than this are merged at read time instead
+FEED_FANOUT_MAX_FOLLOWERS = 10000
+
 SECURE_SSL_REDIRECT = True
 SESSION_COOKIE_SECURE = True
 CSRF_COOKIE_SECURE = True
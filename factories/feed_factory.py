@@ -1,10 +1,36 @@
-from posts.models import Post, Follow
-from django.db.models import Q
+from posts.models import Post, Comment, PostLike, Follow
+from posts.timeline import timeline_posts
+from django.conf import settings
+from django.db.models import Q, Prefetch
 
 class FeedFactory:
     def __init__(self, user):
         self.user = user
 
+    @staticmethod
+    def with_relations(queryset):
+        """
+        Load authors, likers and comment authors for a page of posts in a fixed
+        number of queries, however many likes or comments each post has.
+
+        Only the latest FEED_EMBEDDED_COMMENTS comments per post are loaded (one
+        windowed query for the whole page) into `post.latest_comments`; the rest
+        are served by /api/posts/<id>/comments/.
+        """
+        latest_comments = Comment.objects.select_related('author') \
+            .order_by('-created_at', '-id')[:FeedFactory.embedded_comments_limit()]
+        return queryset.select_related('author').prefetch_related(
+            Prefetch(
+                'post_likes_related',
+                queryset=PostLike.objects.select_related('user').only('post_id', 'user__username')
+            ),
+            Prefetch('comments', queryset=latest_comments, to_attr='latest_comments'),
+        )
+
+    @staticmethod
+    def embedded_comments_limit():
+        return getattr(settings, 'FEED_EMBEDDED_COMMENTS', 3)
+
     def is_authenticated(self):
         return getattr(self.user, 'is_authenticated', False)
 
@@ -12,20 +38,25 @@ class FeedFactory:
         if filter_param:
             filter_param = filter_param.lower().strip()
 
+        # 'top' ranks by the stored engagement score instead of recency
+        ordering = ('-engagement_score', '-id') if filter_param == 'top' else ('-created_at', '-id')
+
         # ✅ STRICT ISOLATION: Only public posts if user is not authenticated
         if not self.is_authenticated():
-            return Post.objects.filter(privacy='public') \
-                .order_by('-created_at') \
-                .select_related('author') \
-                .prefetch_related('post_likes_related', 'comments')
+            return self.with_relations(
+                Post.objects.filter(privacy='public').order_by(*ordering)
+            )
 
         # ✅ AUTHENTICATED USERS
         if filter_param == 'liked':
             posts = Post.objects.filter(post_likes_related__user=self.user).distinct()
 
         elif filter_param == 'followed':
-            followed_users_ids = Follow.objects.filter(follower=self.user).values_list('followed_id', flat=True)
-            posts = Post.objects.filter(author_id__in=followed_users_ids, privacy='public')
+            # Range read over the materialized timeline when fan-out is enabled
+            posts = timeline_posts(self.user.id)
+            if posts is None:
+                followed_users_ids = Follow.objects.filter(follower=self.user).values_list('followed_id', flat=True)
+                posts = Post.objects.filter(author_id__in=followed_users_ids, privacy='public')
 
         elif filter_param == 'private':
             posts = Post.objects.filter(author=self.user, privacy='private')
@@ -39,6 +70,4 @@ class FeedFactory:
                 Q(author_id=self.user.id)  # ✅ USE author_id, not author=self.user
             )
 
-        return posts.order_by('-created_at') \
-                    .select_related('author') \
-                    .prefetch_related('post_likes_related', 'comments')
+        return self.with_relations(posts.order_by(*ordering))
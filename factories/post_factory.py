@@ -3,7 +3,11 @@ from django.contrib.auth.models import User
 
 class PostFactory:
     @staticmethod
-    def create_post(post_type, title, content='', metadata=None, author=None, privacy='public'):
+    def build_post(post_type, title, content='', metadata=None, author=None, privacy='public'):
+        """
+        Validate and return an unsaved Post. Used directly for bulk inserts
+        (e.g. the synthetic data generator) so they follow the same rules.
+        """
         if metadata is None:
             metadata = {}
 
@@ -18,11 +22,20 @@ class PostFactory:
         if not isinstance(author, User):
             raise ValueError("Post author must be a valid User instance")
 
-        return Post.objects.create(
+        return Post(
             title=title,
             content=content,
             post_type=post_type,
             metadata=metadata,
             author=author,
             privacy=privacy  # ✅ This line enables saving private/public status
-        )
\ No newline at end of file
+        )
+
+    @staticmethod
+    def create_post(post_type, title, content='', metadata=None, author=None, privacy='public'):
+        post = PostFactory.build_post(
+            post_type, title, content=content, metadata=metadata, author=author, privacy=privacy
+        )
+        # Followers' timelines are filled by a post_save receiver (posts/signals.py)
+        post.save()
+        return post
@@ -1,6 +1,19 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+
+def ensure_search_index(sender, using, **kwargs):
+    # Table rebuilds in later migrations drop the FTS sync triggers
+    from django.db import connections
+    from .search import install_search_index
+    install_search_index(connections[using])
 
 
 class PostsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'posts'
+
+    def ready(self):
+        # Register signal handlers (feed cache invalidation)
+        from . import signals  # noqa: F401
+        post_migrate.connect(ensure_search_index, sender=self)
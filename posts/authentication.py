@@ -0,0 +1,139 @@
+import hashlib
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import router
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+
+from .lru import LocalLRUCache
+
+# Per-process L1 in front of the shared cache. Entries live for
+# AUTH_CACHE_LOCAL_TIMEOUT seconds, which bounds how long another process can
+# keep using a token or role that was just revoked.
+_local = LocalLRUCache(max_size=getattr(settings, 'AUTH_CACHE_LOCAL_MAX_SIZE', 2048))
+
+
+def _timeouts():
+    return (
+        getattr(settings, 'AUTH_CACHE_LOCAL_TIMEOUT', 30),
+        getattr(settings, 'AUTH_CACHE_TIMEOUT', 300),
+    )
+
+
+def _cached(key, loader):
+    """Read-through lookup: L1, then the shared cache, then `loader()`."""
+    local_timeout, shared_timeout = _timeouts()
+    value = _local.get(key)
+    if value is not LocalLRUCache.MISSING:
+        return value
+    value = cache.get(key)
+    if value is None:
+        value = loader()
+        if value is None:
+            return None
+        cache.set(key, value, timeout=shared_timeout)
+    _local.set(key, value, timeout=local_timeout)
+    return value
+
+
+def _invalidate(key):
+    _local.delete(key)
+    cache.delete(key)
+
+
+def token_cache_key(key):
+    # Never put raw tokens into cache keys
+    return 'auth:token:' + hashlib.sha256(key.encode()).hexdigest()
+
+
+def role_cache_key(user_id):
+    return f'auth:role:{user_id}'
+
+
+def _user_fields():
+    # Everything but the password hash, which stays out of the shared cache
+    return [f.attname for f in get_user_model()._meta.concrete_fields if f.attname != 'password']
+
+
+def _credentials_entry(user, token):
+    """Cacheable snapshot of an authenticated (user, token) pair: plain values only."""
+    return {'user': [getattr(user, name) for name in _user_fields()], 'token': (token.key, token.created)}
+
+
+def _credentials(entry):
+    """
+    Fresh (user, token) instances from a cached snapshot, so nothing set on
+    one request's user leaks into another's. The password is a deferred
+    field, loaded from the database only if something reads it.
+    """
+    from rest_framework.authtoken.models import Token
+
+    User = get_user_model()
+    user = User.from_db(router.db_for_read(User), _user_fields(), entry['user'])
+    key, created = entry['token']
+    token = Token.from_db(router.db_for_read(Token), ['key', 'user_id', 'created'], [key, user.pk, created])
+    token.user = user
+    return user, token
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication that caches the Token -> User lookup. Cached entries
+    are dropped when the token is deleted or its user is saved.
+    """
+
+    def authenticate_credentials(self, key):
+        def load():
+            # Raises AuthenticationFailed for unknown tokens / inactive users
+            return _credentials_entry(*super(CachedTokenAuthentication, self).authenticate_credentials(key))
+        return _credentials(_cached(token_cache_key(key), load))
+
+
+async def aauthenticate_token(request):
+    """
+    Async counterpart of CachedTokenAuthentication for plain async views.
+    Returns the authenticated User, or None when no token was sent.
+    """
+    from rest_framework.authtoken.models import Token
+
+    auth = request.headers.get('Authorization', '').split()
+    if not auth or auth[0].lower() != 'token':
+        return None
+    if len(auth) != 2:
+        raise exceptions.AuthenticationFailed('Invalid token header.')
+
+    key = token_cache_key(auth[1])
+    local_timeout, shared_timeout = _timeouts()
+    value = _local.get(key)
+    if value is LocalLRUCache.MISSING:
+        value = await cache.aget(key)
+        if value is None:
+            try:
+                token = await Token.objects.select_related('user').aget(key=auth[1])
+            except Token.DoesNotExist:
+                raise exceptions.AuthenticationFailed('Invalid token.')
+            if not token.user.is_active:
+                raise exceptions.AuthenticationFailed('User inactive or deleted.')
+            value = _credentials_entry(token.user, token)
+            await cache.aset(key, value, timeout=shared_timeout)
+        _local.set(key, value, timeout=local_timeout)
+    return _credentials(value)[0]
+
+
+def invalidate_token(key):
+    _invalidate(token_cache_key(key))
+
+
+def get_user_role(user):
+    """Role name from the user's profile ('' when there is no profile), cached."""
+    def load():
+        from .models import UserProfile
+        role = UserProfile.objects.filter(user_id=user.pk).values_list('role', flat=True).first()
+        return role or ''
+    return _cached(role_cache_key(user.pk), load)
+
+
+def invalidate_role(user_id):
+    _invalidate(role_cache_key(user_id))
@@ -1,7 +1,52 @@
+from django.http import StreamingHttpResponse
 from rest_framework.views import APIView
 from singletons.logger_singleton import LoggerSingleton 
+from .metrics import InstrumentedViewMixin, timed
+from .pagination import ListCursorPagination
+from .renderers import render_json
 
-class BaseLoggedAPIView(APIView):
+class BaseLoggedAPIView(InstrumentedViewMixin, APIView):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.logger = LoggerSingleton().get_logger()
\ No newline at end of file
+        self.logger = LoggerSingleton().get_logger()
+
+
+def wants_compact(request):
+    """`?compact=1`: user ids plus a side-loaded `users` map instead of usernames."""
+    return request.query_params.get('compact', '').lower() in ('1', 'true', 'yes')
+
+
+class PaginatedListMixin:
+    """
+    Cursor-paginated list responses, with an opt-in `?export=ndjson` mode that
+    streams every row as newline-delimited JSON. The export iterates the
+    queryset in chunks, so memory stays flat however large the table is.
+
+    Views that pass `compact_page` (e.g. serializers.compact_page) also serve
+    the `?compact=1` format.
+    """
+    list_pagination_class = ListCursorPagination
+    export_chunk_size = 500
+
+    def list_response(self, request, queryset, serializer_class, compact_page=None):
+        if request.query_params.get('export') == 'ndjson':
+            return self.stream_ndjson(queryset, serializer_class)
+
+        paginator = self.list_pagination_class()
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        with timed('serialize'):
+            if compact_page is not None and wants_compact(request):
+                data, users = compact_page(page)
+            else:
+                data, users = serializer_class(page, many=True).data, None
+        response = paginator.get_paginated_response(data)
+        if users is not None:
+            response.data['users'] = users
+        return response
+
+    def stream_ndjson(self, queryset, serializer_class):
+        def rows():
+            for obj in queryset.iterator(chunk_size=self.export_chunk_size):
+                yield render_json(serializer_class(obj).data) + b'\n'
+
+        return StreamingHttpResponse(rows(), content_type='application/x-ndjson')
@@ -0,0 +1,97 @@
+"""
+Helpers shared by the benchmark management commands. Reports are plain JSON
+so runs from different commits can be diffed with `benchmark_feed --compare`.
+"""
+import json
+import statistics
+import subprocess
+import time
+from contextlib import ExitStack
+
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of numbers."""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(timings_ms, query_counts=None):
+    summary = {
+        'runs': len(timings_ms),
+        'p50_ms': round(percentile(timings_ms, 50), 3),
+        'p99_ms': round(percentile(timings_ms, 99), 3),
+        'mean_ms': round(statistics.fmean(timings_ms), 3),
+    }
+    if query_counts:
+        summary['queries'] = max(query_counts)
+    return summary
+
+
+def measure(fn, iterations, warmup=2):
+    """
+    Call `fn` repeatedly and return its latency percentiles and query count.
+    `fn` should return an HTTP response; the last status code is recorded.
+    """
+    for _ in range(warmup):
+        fn()
+
+    timings, queries, status = [], [], None
+    for _ in range(iterations):
+        # Every alias: safe-method requests may read from 'read' or 'replica'
+        with ExitStack() as stack:
+            contexts = [stack.enter_context(CaptureQueriesContext(conn)) for conn in connections.all()]
+            start = time.perf_counter()
+            response = fn()
+            timings.append((time.perf_counter() - start) * 1000)
+        queries.append(sum(len(ctx.captured_queries) for ctx in contexts))
+        status = getattr(response, 'status_code', None)
+
+    result = summarize(timings, queries)
+    result['status'] = status
+    return result
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def build_report(name, results, **meta):
+    return {
+        'benchmark': name,
+        'revision': git_revision(),
+        'created_at': timezone.now().isoformat(),
+        'meta': meta,
+        'results': results,
+    }
+
+
+def write_report(path, report):
+    with open(path, 'w') as fh:
+        json.dump(report, fh, indent=2, sort_keys=True)
+
+
+def compare_reports(old, new):
+    """Yield one line per scenario comparing p50/p99/query counts of two reports."""
+    for name, current in sorted(new['results'].items()):
+        previous = old['results'].get(name)
+        if not previous:
+            yield f"{name}: new scenario"
+            continue
+        parts = []
+        for metric in ('p50_ms', 'p99_ms', 'queries', 'ops_per_s'):
+            if metric in current and metric in previous and previous[metric]:
+                change = (current[metric] - previous[metric]) / previous[metric] * 100
+                parts.append(f"{metric} {previous[metric]} -> {current[metric]} ({change:+.1f}%)")
+        yield f"{name}: " + ', '.join(parts)
@@ -0,0 +1,209 @@
+"""
+TieredCache: a per-process L1 in front of a shared L2 cache.
+
+    CACHES = {
+        'default': {
+            'BACKEND': 'posts.cache_backends.TieredCache',
+            'OPTIONS': {'L2': 'shared', 'L1_MAX_ENTRIES': 1000, 'L1_TIMEOUT': 2},
+        },
+        'shared': {'BACKEND': 'django_redis.cache.RedisCache', ...},
+    }
+
+Reads are served from the in-process LRU (LocalLRUCache) for at most
+L1_TIMEOUT seconds before going back to L2, so hot keys such as the
+anonymous feed page and the feed generations cost no network round trip.
+Writes go to L2 and drop the local L1 entry; other processes may see the
+old value for up to L1_TIMEOUT seconds.
+
+When L2 raises (e.g. Redis is down) the backend switches to a local
+LocMemCache for RETRY_AFTER seconds and then tries L2 again, so the service
+keeps working, with per-process caching, instead of failing requests.
+Writes made during the outage (feed generation bumps, auth invalidations)
+never reached L2, so before L2 is used again every key written meanwhile is
+deleted there (L2 is cleared when there are more than RECOVERY_MAX_KEYS).
+A deleted generation counter is reseeded past its old value, so pages
+cached before the outage are not served as current.
+
+get_or_set() coalesces concurrent misses in this process: one thread runs
+the callable and the others wait for its result. It is the API for callers
+that only need per-process coalescing; feed pages use
+feed_cache.get_or_rebuild(), which locks across processes and serves stale
+copies while one request rebuilds.
+"""
+import threading
+import time
+
+from django.core.cache import caches
+from django.core.cache.backends.base import BaseCache, DEFAULT_TIMEOUT
+from django.core.cache.backends.locmem import LocMemCache
+
+from singletons.logger_singleton import LoggerSingleton
+from .lru import LocalLRUCache
+
+logger = LoggerSingleton().get_logger()
+
+# Django creates a backend instance per thread; like LocMemCache, the
+# process-wide state lives at module level, keyed by LOCATION.
+_tiers = {}
+_tiers_lock = threading.Lock()
+
+
+class _Tier:
+    """State shared by every thread's TieredCache instance for one LOCATION."""
+
+    def __init__(self, name, max_entries):
+        self.l1 = LocalLRUCache(max_entries)
+        self.fallback = LocMemCache(f'tiered-fallback-{name}', {'OPTIONS': {'MAX_ENTRIES': 10000}})
+        self.l2_down_until = 0
+        # Keys written to the fallback while L2 was down, None when L2 is healthy
+        self.dirty = None
+        self.dirty_lock = threading.Lock()
+        self.inflight = {}
+        self.inflight_lock = threading.Lock()
+
+
+class TieredCache(BaseCache):
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.l2_alias = options.get('L2', 'shared')
+        self.l1_timeout = options.get('L1_TIMEOUT', 2)
+        self.retry_after = options.get('RETRY_AFTER', 5)
+        self.recovery_max_keys = options.get('RECOVERY_MAX_KEYS', 10000)
+        with _tiers_lock:
+            if location not in _tiers:
+                _tiers[location] = _Tier(location, options.get('L1_MAX_ENTRIES', 1000))
+            self.tier = _tiers[location]
+        self.l1 = self.tier.l1
+        self.fallback = self.tier.fallback
+
+    # -----------------------------
+    #   L2 WITH FALLBACK
+    # -----------------------------
+    WRITE_METHODS = ('set', 'add', 'touch', 'delete', 'incr')
+
+    def _l2(self, method, *args, **kwargs):
+        if time.monotonic() < self.tier.l2_down_until:
+            return self._fallback(method, *args, **kwargs)
+        try:
+            if self.tier.dirty is not None:
+                self._recover()
+            return getattr(caches[self.l2_alias], method)(*args, **kwargs)
+        except ValueError:
+            # Part of the cache API (incr on a missing key), not an outage
+            raise
+        except Exception as e:
+            logger.warning(f"Cache '{self.l2_alias}' failed ({e}); using the local fallback for {self.retry_after}s")
+            self.tier.l2_down_until = time.monotonic() + self.retry_after
+            return self._fallback(method, *args, **kwargs)
+
+    def _fallback(self, method, *args, **kwargs):
+        if method == 'clear' or method in self.WRITE_METHODS:
+            with self.tier.dirty_lock:
+                if self.tier.dirty is None:
+                    self.tier.dirty = set()
+                self.tier.dirty.add(None if method == 'clear' else (args[0], kwargs.get('version')))
+        return getattr(self.fallback, method)(*args, **kwargs)
+
+    def _recover(self):
+        """Undo in L2 what it missed while it was down; raises if L2 is still failing."""
+        with self.tier.dirty_lock:
+            dirty = self.tier.dirty
+            if dirty is None:
+                return
+            l2 = caches[self.l2_alias]
+            if None in dirty or len(dirty) > self.recovery_max_keys:
+                l2.clear()
+            else:
+                for key, version in dirty:
+                    l2.delete(key, version=version)
+            self.tier.dirty = None
+            self.fallback.clear()
+        logger.info(f"Cache '{self.l2_alias}' is back; dropped {len(dirty)} keys written during the outage")
+
+    def _l1_timeout(self, timeout):
+        # Relative seconds: get_backend_timeout() returns an expiry timestamp
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        return self.l1_timeout if timeout is None else min(self.l1_timeout, timeout)
+
+    # -----------------------------
+    #   CACHE API
+    # -----------------------------
+    # L2 gets the caller's key and version and builds its own key, so its
+    # entries are the same ones code using caches['shared'] directly sees.
+    def get(self, key, default=None, version=None):
+        local_key = self.make_and_validate_key(key, version=version)
+        value = self.l1.get(local_key)
+        if value is not LocalLRUCache.MISSING:
+            return value
+        value = self._l2('get', key, LocalLRUCache.MISSING, version=version)
+        if value is LocalLRUCache.MISSING:
+            return default
+        self.l1.set(local_key, value, self.l1_timeout)
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        local_key = self.make_and_validate_key(key, version=version)
+        self.l1.delete(local_key)
+        self._l2('set', key, value, timeout=timeout, version=version)
+        self.l1.set(local_key, value, self._l1_timeout(timeout))
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.l1.delete(self.make_and_validate_key(key, version=version))
+        return self._l2('add', key, value, timeout=timeout, version=version)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self._l2('touch', key, timeout=timeout, version=version)
+
+    def delete(self, key, version=None):
+        self.l1.delete(self.make_and_validate_key(key, version=version))
+        return self._l2('delete', key, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        self.l1.delete(self.make_and_validate_key(key, version=version))
+        return self._l2('incr', key, delta, version=version)
+
+    def has_key(self, key, version=None):
+        return self.get(key, LocalLRUCache.MISSING, version=version) is not LocalLRUCache.MISSING
+
+    def clear(self):
+        self.l1.clear()
+        self.fallback.clear()
+        return self._l2('clear')
+
+    # -----------------------------
+    #   REQUEST COALESCING
+    # -----------------------------
+    def get_or_set(self, key, default, timeout=DEFAULT_TIMEOUT, version=None):
+        """Like BaseCache.get_or_set, but concurrent misses call `default` once."""
+        value = self.get(key, LocalLRUCache.MISSING, version=version)
+        if value is not LocalLRUCache.MISSING:
+            return value
+        if not callable(default):
+            self.add(key, default, timeout=timeout, version=version)
+            return self.get(key, default, version=version)
+
+        full_key = self.make_and_validate_key(key, version=version)
+        with self.tier.inflight_lock:
+            flight = self.tier.inflight.get(full_key)
+            leader = flight is None
+            if leader:
+                flight = self.tier.inflight[full_key] = {'done': threading.Event()}
+        if not leader:
+            flight['done'].wait()
+            if 'value' in flight:
+                return flight['value']
+            # The leader failed; compute our own result
+            return default()
+
+        try:
+            value = default()
+            self.set(key, value, timeout=timeout, version=version)
+            flight['value'] = value
+            return value
+        finally:
+            with self.tier.inflight_lock:
+                self.tier.inflight.pop(full_key, None)
+            flight['done'].set()
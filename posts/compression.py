@@ -0,0 +1,79 @@
+"""
+Precompressed response bodies for cached feed pages.
+
+A feed page is rendered to JSON once and compressed once per supported
+encoding when it is cached; cache hits pick the variant matching the
+client's Accept-Encoding and send it as is. Brotli is used when the
+optional `brotli` package is installed, gzip always.
+"""
+import gzip
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+
+from .renderers import render_json
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+IDENTITY = 'identity'
+
+
+def supported_encodings():
+    """Preferred first."""
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def compress(body, encoding):
+    if encoding == 'br':
+        return brotli.compress(body, quality=getattr(settings, 'RESPONSE_BROTLI_QUALITY', 5))
+    if encoding == 'gzip':
+        # mtime=0 keeps the bytes deterministic for identical pages
+        return gzip.compress(body, compresslevel=getattr(settings, 'RESPONSE_GZIP_LEVEL', 6), mtime=0)
+    return body
+
+
+def compressed_variants(data):
+    """Render `data` once and return {encoding: bytes} for every supported encoding."""
+    body = render_json(data)
+    variants = {IDENTITY: body}
+    # Tiny bodies aren't worth it (same threshold as GZipMiddleware)
+    if len(body) >= 200:
+        for encoding in supported_encodings():
+            variants[encoding] = compress(body, encoding)
+    return variants
+
+
+def accepted_encodings(request):
+    """Encodings the client accepts with a non-zero q-value."""
+    accepted = set()
+    for item in request.headers.get('Accept-Encoding', '').split(','):
+        coding, _, params = item.strip().partition(';')
+        q = params.strip()
+        if q.startswith('q='):
+            try:
+                if float(q[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        if coding:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+def variant_response(request, variants, status_code=200):
+    """Response carrying the best variant for this request's Accept-Encoding."""
+    accepted = accepted_encodings(request)
+    encoding = next(
+        (enc for enc in supported_encodings() if enc in variants and (enc in accepted or '*' in accepted)),
+        IDENTITY
+    )
+    response = HttpResponse(variants[encoding], status=status_code, content_type='application/json')
+    if encoding != IDENTITY:
+        response['Content-Encoding'] = encoding
+    response['Content-Length'] = str(len(variants[encoding]))
+    patch_vary_headers(response, ('Accept-Encoding',))
+    return response
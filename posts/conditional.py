@@ -0,0 +1,52 @@
+"""
+ETag / If-None-Match helpers for the post and feed endpoints.
+
+ETags are built from data that changes whenever the representation does
+(post updated_at and counters, the feed cache generation), so a match can
+be answered with 304 before any serialization, and for feeds before any
+database query.
+"""
+from hashlib import md5
+
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+
+def make_etag(*parts):
+    return '"%s"' % md5(':'.join(str(part) for part in parts).encode()).hexdigest()
+
+
+def weak_etag(*parts):
+    """
+    For bodies served in several content codings (precompressed feed pages):
+    strong tags must differ per coding, weak ones mean "same content".
+    """
+    return 'W/' + make_etag(*parts)
+
+
+def post_etag(post_id, updated_at, like_count, comment_count, pending_likes=0):
+    # Counter updates don't go through save(), so they're part of the tag
+    return make_etag('post', post_id, updated_at.isoformat(), like_count, comment_count, pending_likes)
+
+
+def etag_matches(request, etag):
+    """If-None-Match check (weak comparison, as RFC 9110 requires for it)."""
+    header = request.headers.get('If-None-Match')
+    if not header:
+        return False
+    etags = parse_etags(header)
+    if '*' in etags:
+        return True
+    return etag.removeprefix('W/') in {tag.removeprefix('W/') for tag in etags}
+
+
+def with_etag(response, etag):
+    response['ETag'] = etag
+    # Per-user content: clients may reuse it after revalidating, proxies may not
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def not_modified(etag):
+    return with_etag(Response(status=status.HTTP_304_NOT_MODIFIED), etag)
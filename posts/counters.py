@@ -0,0 +1,96 @@
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Post, Comment, PostLike, CommentLike, Follow, UserProfile
+
+
+def adjust_post_like_count(post_id, delta):
+    Post.objects.filter(pk=post_id).update(like_count=F('like_count') + delta, updated_at=timezone.now())
+
+
+def adjust_post_comment_count(post_id, delta):
+    Post.objects.filter(pk=post_id).update(comment_count=F('comment_count') + delta, updated_at=timezone.now())
+
+
+def touch_post(post_id):
+    """Mark a post as changed when something embedded in it changes (e.g. a comment edit)."""
+    Post.objects.filter(pk=post_id).update(updated_at=timezone.now())
+
+
+def adjust_comment_like_count(comment_id, delta):
+    Comment.objects.filter(pk=comment_id).update(like_count=F('like_count') + delta)
+
+
+def _adjust_profile_counts(user_ids, field, delta):
+    user_ids = set(user_ids)
+    updated = UserProfile.objects.filter(user_id__in=user_ids).update(**{field: F(field) + delta})
+    if updated < len(user_ids) and delta > 0:
+        # Users without a profile yet get one, seeded from the source table
+        # (which already includes the follow that triggered this)
+        existing = set(UserProfile.objects.filter(user_id__in=user_ids).values_list('user_id', flat=True))
+        for user_id in user_ids - existing:
+            UserProfile.objects.get_or_create(user_id=user_id)
+        rebuild_follow_counters(UserProfile.objects.filter(user_id__in=user_ids - existing))
+
+
+def adjust_follow_counts(follower_id, followed_id, delta):
+    _adjust_profile_counts([follower_id], 'following_count', delta)
+    _adjust_profile_counts([followed_id], 'follower_count', delta)
+
+
+def recount_follow_counts(user_ids):
+    """
+    Recount follower/following counts of `user_ids` from Follow, creating
+    missing profiles. For bulk inserts, where ignore_conflicts hides which
+    rows were actually written.
+    """
+    user_ids = set(user_ids)
+    existing = set(UserProfile.objects.filter(user_id__in=user_ids).values_list('user_id', flat=True))
+    for user_id in user_ids - existing:
+        UserProfile.objects.get_or_create(user_id=user_id)
+    return rebuild_follow_counters(UserProfile.objects.filter(user_id__in=user_ids))
+
+
+def _count_of(model, fk, outer='pk'):
+    return Coalesce(Subquery(
+        model.objects.filter(**{fk: OuterRef(outer)})
+        .values(fk).annotate(c=Count('pk')).values('c')
+    ), 0)
+
+
+def rebuild_post_counters(queryset=None):
+    """
+    Recompute like_count/comment_count from the source tables.
+    Returns the number of posts updated.
+    """
+    queryset = Post.objects.all() if queryset is None else queryset
+    return queryset.update(
+        like_count=_count_of(PostLike, 'post'),
+        comment_count=_count_of(Comment, 'post'),
+        updated_at=timezone.now(),
+    )
+
+
+def rebuild_comment_counters(queryset=None):
+    queryset = Comment.objects.all() if queryset is None else queryset
+    return queryset.update(like_count=_count_of(CommentLike, 'comment'))
+
+
+def rebuild_follow_counters(queryset=None):
+    """
+    Recompute follower_count/following_count from Follow. Without a queryset,
+    first creates the missing profiles of users that appear in Follow.
+    """
+    if queryset is None:
+        user_ids = set(Follow.objects.values_list('follower_id', flat=True)) | \
+            set(Follow.objects.values_list('followed_id', flat=True))
+        existing = set(UserProfile.objects.values_list('user_id', flat=True))
+        UserProfile.objects.bulk_create(
+            [UserProfile(user_id=uid) for uid in user_ids - existing], ignore_conflicts=True
+        )
+        queryset = UserProfile.objects.all()
+    return queryset.update(
+        follower_count=_count_of(Follow, 'followed', outer='user_id'),
+        following_count=_count_of(Follow, 'follower', outer='user_id'),
+    )
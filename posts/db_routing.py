@@ -0,0 +1,123 @@
+"""
+Read/write database routing.
+
+GET/HEAD/OPTIONS requests read from one of DATABASE_READ_ALIASES:
+
+- 'replica', a separate database kept in sync asynchronously (locally a
+  second SQLite file refreshed by `manage.py sync_replica`), when
+  REPLICA_DATABASE_PATH is set;
+- otherwise 'read', the same SQLite file opened read-only, under
+  SQLITE_PROFILE=performance. Django keeps one connection per alias per
+  thread, so every worker thread holds a persistent read connection (the
+  read pool) while writes all go through 'default', whose IMMEDIATE
+  transactions and busy timeout serialize writers.
+
+Everything else, and any read inside an atomic block, uses 'default', so a
+POST that writes and then reads back sees its own writes. Because a replica
+lags, a client that just wrote is pinned to 'default' for
+REPLICA_PIN_SECONDS (keyed by its credentials) so it sees its own posts.
+
+Users, tokens, sessions and profiles are always read from 'default': a login
+POST has no credentials to pin by, and the token it returns is used at once.
+"""
+import random
+from contextvars import ContextVar
+from hashlib import sha256
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_read_alias = ContextVar('read_alias', default=None)
+
+PRIMARY_ONLY_MODELS = {'auth.user', 'authtoken.token', 'sessions.session', 'posts.userprofile'}
+
+
+def get_read_aliases():
+    return [alias for alias in getattr(settings, 'DATABASE_READ_ALIASES', ()) if alias in connections.settings]
+
+
+def get_pin_seconds():
+    return getattr(settings, 'REPLICA_PIN_SECONDS', 10)
+
+
+def pin_key(request):
+    """Cache key identifying the client (token or session), or None if anonymous."""
+    credential = request.headers.get('Authorization') or request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    if not credential:
+        return None
+    return 'db:pin:' + sha256(credential.encode()).hexdigest()
+
+
+class ReadOnlyRequestMiddleware:
+    """
+    Picks the read alias for safe-method requests, and after a successful
+    write pins the client to the primary for REPLICA_PIN_SECONDS.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(self.get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def choose_alias(self, request, pinned):
+        aliases = get_read_aliases()
+        if request.method not in SAFE_METHODS or not aliases or pinned:
+            return None
+        return random.choice(aliases)
+
+    def should_pin(self, request, response):
+        return request.method not in SAFE_METHODS and response.status_code < 400 and get_read_aliases()
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        key = pin_key(request)
+        pinned = bool(key and request.method in SAFE_METHODS and get_read_aliases() and cache.get(key))
+        token = _read_alias.set(self.choose_alias(request, pinned))
+        try:
+            response = self.get_response(request)
+        finally:
+            _read_alias.reset(token)
+        if key and self.should_pin(request, response):
+            cache.set(key, 1, timeout=get_pin_seconds())
+        return response
+
+    async def __acall__(self, request):
+        key = pin_key(request)
+        pinned = bool(key and request.method in SAFE_METHODS and get_read_aliases() and await cache.aget(key))
+        token = _read_alias.set(self.choose_alias(request, pinned))
+        try:
+            response = await self.get_response(request)
+        finally:
+            _read_alias.reset(token)
+        if key and self.should_pin(request, response):
+            await cache.aset(key, 1, timeout=get_pin_seconds())
+        return response
+
+
+class ReadWriteRouter:
+
+    def db_for_read(self, model, **hints):
+        alias = _read_alias.get()
+        if model._meta.label_lower in PRIMARY_ONLY_MODELS:
+            return 'default'
+        if alias and not connections['default'].in_atomic_block:
+            return alias
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Every alias holds the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
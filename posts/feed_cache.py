@@ -0,0 +1,194 @@
+import asyncio
+import math
+import random
+import time
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import cache
+
+# Feed pages are cached under keys that embed a "generation" number. Writes
+# bump the generation instead of hunting down keys, so invalidation is a
+# single INCR and old pages simply age out of the cache.
+GLOBAL_GENERATION_KEY = 'feed:gen:global'
+
+
+def user_generation_key(user_id):
+    return f'feed:gen:user:{user_id}'
+
+
+def _seed():
+    # Seed with a timestamp rather than 0 so an evicted counter never
+    # restarts at a generation that older cached pages were stored under.
+    return int(time.time() * 1000)
+
+
+def _current(key):
+    value = cache.get(key)
+    if value is None:
+        cache.add(key, _seed(), timeout=None)
+        value = cache.get(key)
+    return value
+
+
+def _bump(key):
+    if not cache.add(key, _seed(), timeout=None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Key expired between add() and incr()
+            cache.set(key, _seed(), timeout=None)
+
+
+def get_feed_generation(user_id=None):
+    """
+    Return the generation string a feed page for `user_id` is cached under.
+    Anonymous feeds only depend on the global generation.
+    """
+    if user_id is None:
+        return f"{_current(GLOBAL_GENERATION_KEY)}"
+    return f"{_current(GLOBAL_GENERATION_KEY)}.{_current(user_generation_key(user_id))}"
+
+
+async def _acurrent(key):
+    value = await cache.aget(key)
+    if value is None:
+        await cache.aadd(key, _seed(), timeout=None)
+        value = await cache.aget(key)
+    return value
+
+
+async def aget_feed_generation(user_id=None):
+    """Async counterpart of get_feed_generation."""
+    if user_id is None:
+        return f"{await _acurrent(GLOBAL_GENERATION_KEY)}"
+    return f"{await _acurrent(GLOBAL_GENERATION_KEY)}.{await _acurrent(user_generation_key(user_id))}"
+
+
+def bump_global_feed_generation():
+    """Invalidate every cached feed page (public content changed)."""
+    _bump(GLOBAL_GENERATION_KEY)
+
+
+def bump_user_feed_generation(user_id):
+    """Invalidate only the feed pages of one user (e.g. their follows changed)."""
+    _bump(user_generation_key(user_id))
+
+
+def get_feed_cache_timeout():
+    return getattr(settings, 'FEED_CACHE_TIMEOUT', 60)
+
+
+def get_feed_stale_seconds():
+    return getattr(settings, 'FEED_CACHE_STALE_SECONDS', 60)
+
+
+def get_feed_rebuild_lock_seconds():
+    return getattr(settings, 'FEED_REBUILD_LOCK_SECONDS', 10)
+
+
+def feed_page_key(namespace, user_id, filter_param, paginator, position, page_size, compact):
+    """
+    (raw key, cache key) of one feed page. The generation is not part of it:
+    get_or_rebuild stores it with the page. `namespace` separates views whose
+    pages differ (the async feed's links point at the async URLs).
+    """
+    key_raw = f"{namespace}:{user_id}:{filter_param}:{type(paginator).__name__}:{position}:{page_size}:{compact}"
+    return key_raw, md5(key_raw.encode()).hexdigest()
+
+
+def _needs_refresh(entry, generation, beta):
+    if entry['generation'] != generation:
+        return True
+    # XFetch: refresh early with a probability that rises as expiry nears,
+    # scaled by how long the page took to build, so one request refreshes a
+    # hot page before it expires instead of all of them after.
+    return time.time() - entry['delta'] * beta * math.log(1 - random.random()) >= entry['expires']
+
+
+def get_or_rebuild(key, generation, build, timeout=None):
+    """
+    Stampede-safe read of a cached feed page.
+
+    The page is stored under `key`, which does not include the generation,
+    together with the generation it was built for. When it is missing, built
+    for an older generation, or picked for early refresh, one request takes a
+    lock (cache.add, so it is shared across processes) and rebuilds it.
+    Concurrent requests meanwhile serve the previous copy, or wait for the
+    rebuild when there is none.
+
+    Returns (value, generation the value was built for, rebuilt).
+    """
+    timeout = get_feed_cache_timeout() if timeout is None else timeout
+    lock_seconds = get_feed_rebuild_lock_seconds()
+    entry = cache.get(key)
+    if entry is not None and not _needs_refresh(entry, generation, getattr(settings, 'FEED_XFETCH_BETA', 1.0)):
+        return entry['value'], entry['generation'], False
+
+    lock_key = f'{key}:rebuild'
+    locked = cache.add(lock_key, 1, timeout=lock_seconds)
+    if not locked:
+        if entry is not None:
+            # Stale while revalidate
+            return entry['value'], entry['generation'], False
+        deadline = time.monotonic() + lock_seconds
+        while time.monotonic() < deadline:
+            time.sleep(0.05)
+            rebuilding = cache.get(lock_key) is not None
+            entry = cache.get(key)
+            if entry is not None and entry['generation'] == generation:
+                return entry['value'], entry['generation'], False
+            if not rebuilding:
+                break
+        # The rebuilding request failed or is too slow: build it ourselves
+
+    try:
+        start = time.monotonic()
+        value = build()
+        cache.set(key, _entry(value, generation, start, timeout), timeout=timeout + get_feed_stale_seconds())
+    finally:
+        if locked:
+            cache.delete(lock_key)
+    return value, generation, True
+
+
+async def aget_or_rebuild(key, generation, build, timeout=None):
+    """Async counterpart of get_or_rebuild; `build` is a coroutine function."""
+    timeout = get_feed_cache_timeout() if timeout is None else timeout
+    lock_seconds = get_feed_rebuild_lock_seconds()
+    entry = await cache.aget(key)
+    if entry is not None and not _needs_refresh(entry, generation, getattr(settings, 'FEED_XFETCH_BETA', 1.0)):
+        return entry['value'], entry['generation'], False
+
+    lock_key = f'{key}:rebuild'
+    locked = await cache.aadd(lock_key, 1, timeout=lock_seconds)
+    if not locked:
+        if entry is not None:
+            return entry['value'], entry['generation'], False
+        deadline = time.monotonic() + lock_seconds
+        while time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+            rebuilding = await cache.aget(lock_key) is not None
+            entry = await cache.aget(key)
+            if entry is not None and entry['generation'] == generation:
+                return entry['value'], entry['generation'], False
+            if not rebuilding:
+                break
+
+    try:
+        start = time.monotonic()
+        value = await build()
+        await cache.aset(key, _entry(value, generation, start, timeout), timeout=timeout + get_feed_stale_seconds())
+    finally:
+        if locked:
+            await cache.adelete(lock_key)
+    return value, generation, True
+
+
+def _entry(value, generation, start, timeout):
+    return {
+        'value': value,
+        'generation': generation,
+        'delta': time.monotonic() - start,
+        'expires': time.time() + timeout,
+    }
@@ -0,0 +1,219 @@
+"""
+Write-behind buffering for post likes.
+
+With LIKE_BUFFER_BACKEND set, PostLikeListCreateView records a like in a
+per-post set (in memory or in Redis) instead of inserting a PostLike row.
+The set dedupes repeated likes; a background flush moves everything into
+PostLike with one bulk insert and recomputes like_count for the touched
+posts. Read paths merge the pending likes (see PostSerializer), so counts
+are right before the flush lands.
+
+The 'memory' backend only works for a single process and flushes from a
+daemon thread; use 'redis' plus `manage.py flush_like_buffer` otherwise.
+"""
+import threading
+import time
+import uuid
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+from singletons.logger_singleton import LoggerSingleton
+from .counters import rebuild_post_counters
+from .feed_cache import bump_global_feed_generation
+from .models import Post, PostLike, User
+from .ranking import recompute_engagement_scores
+
+logger = LoggerSingleton().get_logger()
+
+
+def _member(user_id, username):
+    return f"{user_id}:{username}"
+
+
+def _parse_member(member):
+    if isinstance(member, bytes):
+        member = member.decode()
+    user_id, username = member.split(':', 1)
+    return int(user_id), username
+
+
+class MemoryLikeBuffer:
+    def __init__(self):
+        self._likes = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def add(self, post_id, user_id, username):
+        """Record a like; returns False if it was already pending."""
+        member = _member(user_id, username)
+        with self._lock:
+            if member in self._likes[post_id]:
+                return False
+            self._likes[post_id].add(member)
+            return True
+
+    def pending(self, post_ids):
+        with self._lock:
+            return {
+                pid: [_parse_member(m) for m in self._likes[pid]]
+                for pid in post_ids if self._likes.get(pid)
+            }
+
+    def drain(self):
+        with self._lock:
+            drained, self._likes = self._likes, defaultdict(set)
+        return {pid: [_parse_member(m) for m in members] for pid, members in drained.items() if members}
+
+    def restore(self, drained):
+        """Put back likes from drain() that could not be flushed."""
+        with self._lock:
+            for pid, members in drained.items():
+                self._likes[pid].update(_member(uid, name) for uid, name in members)
+
+
+class RedisLikeBuffer:
+    INDEX_KEY = 'likebuf:posts'
+
+    def __init__(self, alias):
+        from django_redis import get_redis_connection
+        self.redis = get_redis_connection(alias)
+
+    def key(self, post_id):
+        return f'likebuf:{post_id}'
+
+    def add(self, post_id, user_id, username):
+        pipe = self.redis.pipeline()
+        pipe.sadd(self.key(post_id), _member(user_id, username))
+        pipe.sadd(self.INDEX_KEY, post_id)
+        added, _ = pipe.execute()
+        return bool(added)
+
+    def pending(self, post_ids):
+        post_ids = list(post_ids)
+        if not post_ids:
+            return {}
+        pipe = self.redis.pipeline(transaction=False)
+        for pid in post_ids:
+            pipe.smembers(self.key(pid))
+        return {
+            pid: [_parse_member(m) for m in members]
+            for pid, members in zip(post_ids, pipe.execute()) if members
+        }
+
+    def drain(self):
+        from redis.exceptions import ResponseError
+
+        drained = {}
+        for raw_pid in self.redis.smembers(self.INDEX_KEY):
+            pid = int(raw_pid)
+            # Unindex first: a like racing in re-adds the post to the index
+            self.redis.srem(self.INDEX_KEY, pid)
+            flushing = f'{self.key(pid)}:flushing:{uuid.uuid4().hex}'
+            try:
+                self.redis.rename(self.key(pid), flushing)
+            except ResponseError:
+                continue  # already drained
+            pipe = self.redis.pipeline()
+            pipe.smembers(flushing)
+            pipe.delete(flushing)
+            members, _ = pipe.execute()
+            if members:
+                drained[pid] = [_parse_member(m) for m in members]
+        return drained
+
+    def restore(self, drained):
+        """Put back likes from drain() that could not be flushed."""
+        pipe = self.redis.pipeline()
+        for pid, members in drained.items():
+            pipe.sadd(self.key(pid), *[_member(uid, name) for uid, name in members])
+            pipe.sadd(self.INDEX_KEY, pid)
+        pipe.execute()
+
+
+_buffers = {}
+_flusher = None
+_flusher_lock = threading.Lock()
+
+
+def get_like_buffer():
+    """Return the configured buffer, or None when likes are written directly."""
+    backend = getattr(settings, 'LIKE_BUFFER_BACKEND', None)
+    if not backend:
+        return None
+    if backend not in _buffers:
+        if backend == 'memory':
+            _buffers[backend] = MemoryLikeBuffer()
+        elif backend == 'redis':
+            _buffers[backend] = RedisLikeBuffer(getattr(settings, 'LIKE_BUFFER_REDIS_ALIAS', 'default'))
+        else:
+            raise ValueError(f"Unknown LIKE_BUFFER_BACKEND: {backend}")
+    if backend == 'memory':
+        _ensure_flusher()
+    return _buffers[backend]
+
+
+def pending_likes_for(post_ids):
+    """{post_id: [(user_id, username), ...]} of likes not yet flushed."""
+    buffer = get_like_buffer()
+    if buffer is None:
+        return {}
+    return buffer.pending(post_ids)
+
+
+def flush_like_buffer():
+    """Move buffered likes into PostLike. Returns the number of likes flushed."""
+    buffer = get_like_buffer()
+    if buffer is None:
+        return 0
+    drained = buffer.drain()
+    if not drained:
+        return 0
+
+    try:
+        # Skip likes whose post or user disappeared since they were buffered
+        post_ids = set(Post.objects.filter(id__in=drained).values_list('id', flat=True))
+        user_ids = {uid for members in drained.values() for uid, _ in members}
+        user_ids = set(User.objects.filter(id__in=user_ids).values_list('id', flat=True))
+        likes = [
+            PostLike(post_id=pid, user_id=uid)
+            for pid, members in drained.items() if pid in post_ids
+            for uid, _ in members if uid in user_ids
+        ]
+        with transaction.atomic():
+            PostLike.objects.bulk_create(likes, batch_size=500, ignore_conflicts=True)
+            # Recount instead of adding len(likes): some buffered likes may already
+            # have been persisted, and ignore_conflicts hides which ones.
+            rebuild_post_counters(Post.objects.filter(id__in=post_ids))
+            recompute_engagement_scores(Post.objects.filter(id__in=post_ids))
+    except Exception:
+        # Nothing was written: hand the likes back for the next flush
+        buffer.restore(drained)
+        raise
+    bump_global_feed_generation()
+    return len(likes)
+
+
+def run_flusher(interval, stop_event=None):
+    """Flush forever (until `stop_event` is set), every `interval` seconds."""
+    while stop_event is None or not stop_event.is_set():
+        time.sleep(interval)
+        try:
+            flushed = flush_like_buffer()
+            if flushed:
+                logger.info(f"Flushed {flushed} buffered likes")
+        except Exception:
+            logger.exception("Flushing buffered likes failed")
+        finally:
+            close_old_connections()
+
+
+def _ensure_flusher():
+    global _flusher
+    if _flusher is not None and _flusher.is_alive():
+        return
+    with _flusher_lock:
+        if _flusher is None or not _flusher.is_alive():
+            interval = getattr(settings, 'LIKE_BUFFER_FLUSH_INTERVAL', 2)
+            _flusher = threading.Thread(target=run_flusher, args=(interval,), name='like-buffer-flusher', daemon=True)
+            _flusher.start()
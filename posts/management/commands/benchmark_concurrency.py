@@ -0,0 +1,110 @@
+import json
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, IntegrityError, OperationalError
+from django.test import Client, override_settings
+
+from posts.benchmarks import summarize, build_report, write_report, compare_reports
+from posts.models import Post, PostLike, Comment
+
+
+class Command(BaseCommand):
+    help = (
+        "Run feed readers and like/comment writers concurrently for a fixed time and "
+        "report throughput and latency. Run once per SQLITE_PROFILE and --compare."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=8)
+        parser.add_argument('--writers', type=int, default=2)
+        parser.add_argument('--duration', type=float, default=10.0, help="Seconds.")
+        parser.add_argument('--output', default='bench_concurrency.json')
+        parser.add_argument('--compare', help="Previous report to compare against.")
+
+    def handle(self, *args, **options):
+        self.user_ids = list(User.objects.values_list('id', flat=True)[:1000])
+        self.post_ids = list(Post.objects.filter(privacy='public').values_list('id', flat=True)[:5000])
+        if not self.user_ids or not self.post_ids:
+            raise CommandError("No data to benchmark; run generate_social_graph first.")
+
+        self.deadline = time.perf_counter() + options['duration']
+        self.samples = {'read': [], 'write': []}
+        self.errors = {'read': 0, 'write': 0}
+        self.lock = threading.Lock()
+
+        # Uncached, so every read hits the database
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}):
+            threads = [threading.Thread(target=self.worker, args=('read', self.read_once))
+                       for _ in range(options['readers'])]
+            threads += [threading.Thread(target=self.worker, args=('write', self.write_once))
+                        for _ in range(options['writers'])]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        results = {}
+        for kind, timings in self.samples.items():
+            if timings:
+                results[kind] = dict(summarize(timings), ops_per_s=round(len(timings) / options['duration'], 1),
+                                     errors=self.errors[kind])
+                self.stdout.write(f"{kind}: {results[kind]}")
+
+        report = build_report(
+            'concurrency', results,
+            profile=getattr(settings, 'SQLITE_PROFILE', '') or 'default',
+            readers=options['readers'],
+            writers=options['writers'],
+            duration=options['duration'],
+        )
+        write_report(options['output'], report)
+        self.stdout.write(self.style.SUCCESS(f"Report written to {options['output']}"))
+
+        if options['compare']:
+            with open(options['compare']) as fh:
+                for line in compare_reports(json.load(fh), report):
+                    self.stdout.write(line)
+
+    def worker(self, kind, operation):
+        rng = random.Random()
+        client = Client()
+        try:
+            while time.perf_counter() < self.deadline:
+                start = time.perf_counter()
+                try:
+                    ok = operation(client, rng)
+                except OperationalError:
+                    # "database is locked" once the busy timeout runs out
+                    ok = False
+                elapsed = (time.perf_counter() - start) * 1000
+                with self.lock:
+                    if ok:
+                        self.samples[kind].append(elapsed)
+                    else:
+                        self.errors[kind] += 1
+        finally:
+            connections.close_all()
+
+    def read_once(self, client, rng):
+        response = client.get('/api/feed/', {'pagination': 'cursor', 'filter': rng.choice(['top', 'public'])},
+                              secure=True)
+        return response.status_code == 200
+
+    def write_once(self, client, rng):
+        user_id, post_id = rng.choice(self.user_ids), rng.choice(self.post_ids)
+        if rng.random() < 0.5:
+            Comment.objects.create(text='benchmark', author_id=user_id, post_id=post_id)
+            return True
+        # Toggle a like so the table doesn't just grow
+        deleted, _ = PostLike.objects.filter(user_id=user_id, post_id=post_id).delete()
+        if not deleted:
+            try:
+                PostLike.objects.create(user_id=user_id, post_id=post_id)
+            except IntegrityError:
+                pass
+        return True
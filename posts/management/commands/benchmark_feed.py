@@ -0,0 +1,78 @@
+import json
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from django.test import Client, override_settings
+from rest_framework.authtoken.models import Token
+
+from posts.benchmarks import measure, build_report, write_report, compare_reports
+from posts.models import Post
+
+FEED_FILTERS = (None, 'liked', 'followed', 'private', 'public', 'top')
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure p50/p99 latency and query counts of the feed, post and follow "
+        "endpoints and write a JSON report (run generate_social_graph first)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--output', default='bench_feed.json')
+        parser.add_argument('--compare', help="Previous report to compare against.")
+        parser.add_argument('--with-cache', action='store_true',
+                            help="Keep the configured cache (default measures the uncached path).")
+
+    def handle(self, *args, **options):
+        # The busiest follower makes the 'followed' feed representative
+        user = User.objects.annotate(n=Count('followers')).order_by('-n').first()
+        post = Post.objects.filter(privacy='public').order_by('-like_count').first()
+        if user is None or post is None:
+            raise CommandError("No data to benchmark; run generate_social_graph first.")
+
+        token, _ = Token.objects.get_or_create(user=user)
+        anon = Client()
+        client = Client(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+        def get(c, url):
+            return lambda: c.get(url, secure=True)
+
+        scenarios = {'feed:anon': get(anon, '/api/feed/')}
+        for filter_param in FEED_FILTERS:
+            query = f'?filter={filter_param}' if filter_param else '?'
+            scenarios[f'feed:{filter_param or "all"}'] = get(client, f'/api/feed/{query}')
+            scenarios[f'feed:{filter_param or "all"}:cursor'] = get(
+                client, f'/api/feed/{query}&pagination=cursor'
+            )
+        scenarios.update({
+            'feed:all:compact': get(client, '/api/feed/?compact=1'),
+            'posts:list': get(client, '/api/posts/'),
+            'posts:detail': get(client, f'/api/posts/{post.id}/'),
+            'users:follow-info': get(client, f'/api/users/{user.id}/follow-info/'),
+        })
+
+        overrides = {} if options['with_cache'] else {
+            'CACHES': {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+        }
+        results = {}
+        with override_settings(**overrides):
+            for name, fn in scenarios.items():
+                results[name] = measure(fn, options['iterations'])
+                self.stdout.write(f"{name}: {results[name]}")
+
+        report = build_report(
+            'feed', results,
+            iterations=options['iterations'],
+            cache=options['with_cache'],
+            users=User.objects.count(),
+            posts=Post.objects.count(),
+        )
+        write_report(options['output'], report)
+        self.stdout.write(self.style.SUCCESS(f"Report written to {options['output']}"))
+
+        if options['compare']:
+            with open(options['compare']) as fh:
+                for line in compare_reports(json.load(fh), report):
+                    self.stdout.write(line)
@@ -0,0 +1,82 @@
+import json
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.test import Client, override_settings
+
+from posts.benchmarks import measure, build_report, write_report, compare_reports
+from posts.models import Post
+from posts.search import fts_available, search_posts
+
+# Frequent, multi-word and prefix queries over generate_social_graph's vocabulary,
+# plus a term that matches nothing (the worst case for a LIKE scan)
+QUERIES = ('coffee', 'launch review', 'friends weekend music', 'proj', 'zyzzyva')
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure /api/search/ latency (FTS5) against an icontains scan baseline "
+        "and write a JSON report. --corpus tops the post table up to that size first."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--corpus', type=int, default=0,
+                            help="Generate posts until there are at least this many (e.g. 1000000).")
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument('--output', default='bench_search.json')
+        parser.add_argument('--compare', help="Previous report to compare against.")
+        parser.add_argument('--skip-baseline', action='store_true',
+                            help="Don't time the icontains scan (slow on large corpora).")
+
+    def handle(self, *args, **options):
+        missing = options['corpus'] - Post.objects.count()
+        if missing > 0:
+            self.stdout.write(f"Generating {missing} posts...")
+            call_command(
+                'generate_social_graph', users=max(1000, missing // 100), posts=missing,
+                likes=missing // 10, comments=missing // 10, batch_size=5000, stdout=self.stdout
+            )
+
+        client = Client()
+        scenarios = {}
+        for query in QUERIES:
+            # Full request (query + relations + serialization) ...
+            scenarios[f'api:{query}'] = (
+                lambda q=query: client.get('/api/search/', {'q': q}, secure=True)
+            )
+            # ... and the page query alone, comparable with the baseline
+            scenarios[f'fts:{query}'] = lambda q=query: list(search_posts(None, q)[:21])
+            if not options['skip_baseline']:
+                scenarios[f'icontains:{query}'] = lambda q=query: self.icontains_page(q)
+        scenarios['api:comments:coffee'] = (
+            lambda: client.get('/api/search/', {'q': 'coffee', 'type': 'comments'}, secure=True)
+        )
+
+        results = {}
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}):
+            for name, fn in scenarios.items():
+                results[name] = measure(fn, options['iterations'])
+                self.stdout.write(f"{name}: {results[name]}")
+
+        report = build_report(
+            'search', results,
+            iterations=options['iterations'],
+            fts=fts_available(),
+            posts=Post.objects.count(),
+        )
+        write_report(options['output'], report)
+        self.stdout.write(self.style.SUCCESS(f"Report written to {options['output']}"))
+
+        if options['compare']:
+            with open(options['compare']) as fh:
+                for line in compare_reports(json.load(fh), report):
+                    self.stdout.write(line)
+
+    def icontains_page(self, query):
+        # What search would cost without the index: a LIKE scan over both
+        # columns (unranked, so frequent terms can stop early)
+        match = Q()
+        for term in query.split():
+            match &= Q(title__icontains=term) | Q(content__icontains=term)
+        return list(Post.objects.filter(match, privacy='public').order_by('-created_at', '-id')[:21])
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from posts.feed_cache import bump_global_feed_generation
+from posts.ranking import decay_engagement_scores
+
+
+class Command(BaseCommand):
+    help = "Re-apply time decay to the engagement scores used by the 'top' feed (run periodically, e.g. every 15 minutes)."
+
+    def handle(self, *args, **options):
+        updated = decay_engagement_scores()
+        # Cached 'top' pages are ordered by the old scores
+        bump_global_feed_generation()
+        self.stdout.write(self.style.SUCCESS(f"Updated engagement scores for {updated} posts."))
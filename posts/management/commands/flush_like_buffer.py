@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.conf import settings
+
+from posts.like_buffer import get_like_buffer, flush_like_buffer, run_flusher
+
+
+class Command(BaseCommand):
+    help = "Flush write-behind buffered likes into PostLike (once, or continuously with --loop)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help="Keep flushing every --interval seconds.")
+        parser.add_argument('--interval', type=float, default=None)
+
+    def handle(self, *args, **options):
+        if get_like_buffer() is None:
+            raise CommandError("LIKE_BUFFER_BACKEND is not configured.")
+        if settings.LIKE_BUFFER_BACKEND == 'memory':
+            raise CommandError("The 'memory' buffer lives inside the web process and is flushed there.")
+
+        if options['loop']:
+            interval = options['interval'] or getattr(settings, 'LIKE_BUFFER_FLUSH_INTERVAL', 2)
+            self.stdout.write(f"Flushing buffered likes every {interval}s...")
+            run_flusher(interval)
+        else:
+            flushed = flush_like_buffer()
+            self.stdout.write(self.style.SUCCESS(f"Flushed {flushed} likes."))
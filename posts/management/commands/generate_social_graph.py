@@ -0,0 +1,149 @@
+import random
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from factories.post_factory import PostFactory
+from posts.counters import rebuild_post_counters, rebuild_comment_counters, rebuild_follow_counters
+from posts.feed_cache import bump_global_feed_generation
+from posts.ranking import recompute_engagement_scores
+from posts.models import Post, Comment, PostLike, Follow
+from posts.timeline import get_timeline_store
+
+WORDS = (
+    "connect share update photo travel coffee weekend project music code "
+    "launch team idea morning city friends review release learn build"
+).split()
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a synthetic social graph (users, follows, posts, likes, comments) "
+        "with bulk inserts, for benchmarking."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--avg-follows', type=int, default=20,
+                            help="Mean number of accounts each user follows.")
+        parser.add_argument('--popularity-skew', type=float, default=1.1,
+                            help="Zipf exponent for how followers/likes concentrate on popular users.")
+        parser.add_argument('--posts', type=int, default=10000)
+        parser.add_argument('--likes', type=int, default=50000)
+        parser.add_argument('--comments', type=int, default=20000)
+        parser.add_argument('--private-ratio', type=float, default=0.1)
+        parser.add_argument('--days', type=int, default=30,
+                            help="Spread post timestamps over this many days.")
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--prefix', default='synth')
+        parser.add_argument('--seed', type=int, default=None)
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+
+        users = self.create_users(options['users'], options['prefix'])
+        # Zipf weights: a few accounts get most of the followers and engagement
+        weights = [1 / (rank ** options['popularity_skew']) for rank in range(1, len(users) + 1)]
+        self.rng.shuffle(weights)
+
+        follows = self.create_follows(users, weights, options['avg_follows'])
+        posts = self.create_posts(users, weights, options['posts'], options['private_ratio'], options['days'])
+        likes = self.create_likes(users, posts, weights, options['likes'])
+        comments = self.create_comments(users, posts, options['comments'])
+
+        # bulk_create skips signals, so rebuild the derived data explicitly
+        post_ids = [p.id for p in posts]
+        rebuild_post_counters(Post.objects.filter(id__in=post_ids))
+        rebuild_comment_counters(Comment.objects.filter(post_id__in=post_ids))
+        rebuild_follow_counters()
+        recompute_engagement_scores(Post.objects.filter(id__in=post_ids))
+        bump_global_feed_generation()
+        if get_timeline_store() is not None:
+            call_command('rebuild_timelines', stdout=self.stdout)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {len(users)} users, {follows} follows, {len(posts)} posts, "
+            f"{likes} likes and {comments} comments."
+        ))
+
+    def sentence(self, n):
+        return ' '.join(self.rng.choice(WORDS) for _ in range(n))
+
+    def create_users(self, count, prefix):
+        run = f"{prefix}{self.rng.randrange(16 ** 6):06x}"
+        users = [User(username=f"{run}_{i}", email=f"{run}_{i}@example.com", password='!')
+                 for i in range(count)]
+        User.objects.bulk_create(users, batch_size=self.batch_size)
+        # SQLite doesn't hand back ids from bulk_create on every version
+        return list(User.objects.filter(username__startswith=f"{run}_").order_by('id'))
+
+    def create_follows(self, users, weights, avg_follows):
+        follows = []
+        for follower in users:
+            degree = min(len(users) - 1, int(self.rng.expovariate(1 / avg_follows)))
+            followed = set(self.rng.choices(users, weights=weights, k=degree))
+            followed.discard(follower)
+            follows.extend(Follow(follower=follower, followed=f) for f in followed)
+        Follow.objects.bulk_create(follows, batch_size=self.batch_size, ignore_conflicts=True)
+        return len(follows)
+
+    def create_posts(self, users, weights, count, private_ratio, days):
+        now = timezone.now()
+        authors = self.rng.choices(users, weights=weights, k=count)
+        posts = []
+        for author in authors:
+            post_type = self.rng.choices(['text', 'image', 'video'], weights=[8, 3, 1])[0]
+            metadata = {}
+            if post_type == 'image':
+                metadata = {'file_size': self.rng.randint(10_000, 5_000_000)}
+            elif post_type == 'video':
+                metadata = {'duration': self.rng.randint(5, 600)}
+            # Same validation rules as the API
+            posts.append(PostFactory.build_post(
+                post_type=post_type,
+                title=self.sentence(4).capitalize(),
+                content=self.sentence(self.rng.randint(5, 40)),
+                metadata=metadata,
+                author=author,
+                privacy='private' if self.rng.random() < private_ratio else 'public',
+            ))
+
+        with transaction.atomic():
+            created = Post.objects.bulk_create(posts, batch_size=self.batch_size)
+            if created and created[0].pk is None:
+                created = list(Post.objects.filter(author__in=users).order_by('id'))
+            # auto_now_add stamps every row with "now"; spread them out over time
+            for post in created:
+                post.created_at = now - timedelta(seconds=self.rng.randrange(days * 86400))
+            Post.objects.bulk_update(created, ['created_at'], batch_size=self.batch_size)
+        return created
+
+    def create_likes(self, users, posts, weights, count):
+        if not posts:
+            return 0
+        # Popular authors' posts attract more likes
+        author_weight = {u.id: w for u, w in zip(users, weights)}
+        post_weights = [author_weight.get(p.author_id, 1) for p in posts]
+        likers = self.rng.choices(users, k=count)
+        liked = self.rng.choices(posts, weights=post_weights, k=count)
+        pairs = {(u.id, p.id) for u, p in zip(likers, liked) if p.author_id != u.id}
+        PostLike.objects.bulk_create(
+            [PostLike(user_id=u, post_id=p) for u, p in pairs],
+            batch_size=self.batch_size, ignore_conflicts=True
+        )
+        return len(pairs)
+
+    def create_comments(self, users, posts, count):
+        if not posts:
+            return 0
+        comments = [
+            Comment(text=self.sentence(self.rng.randint(3, 20)), author=author, post=post)
+            for author, post in zip(self.rng.choices(users, k=count), self.rng.choices(posts, k=count))
+        ]
+        Comment.objects.bulk_create(comments, batch_size=self.batch_size)
+        return len(comments)
@@ -0,0 +1,84 @@
+import asyncio
+import time
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from django.test import AsyncClient, override_settings
+from rest_framework.authtoken.models import Token
+
+from posts.benchmarks import summarize, build_report, write_report
+
+# (name, sync path, async path)
+ENDPOINTS = (
+    ('feed', '/api/feed/?filter=followed', '/api/async/feed/?filter=followed'),
+    ('feed:cursor', '/api/feed/?pagination=cursor', '/api/async/feed/?pagination=cursor'),
+    ('posts:list', '/api/posts/', '/api/async/posts/'),
+    ('users:follow-info', '/api/users/{user_id}/follow-info/', '/api/async/users/{user_id}/follow-info/'),
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Fire concurrent requests at the sync and async versions of the read "
+        "endpoints through the ASGI handler and compare latency and throughput."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--concurrency', type=int, default=20)
+        parser.add_argument('--output', default='bench_async.json')
+        parser.add_argument('--with-cache', action='store_true')
+
+    def handle(self, *args, **options):
+        user = User.objects.annotate(n=Count('followers')).order_by('-n').first()
+        if user is None:
+            raise CommandError("No data to load test; run generate_social_graph first.")
+        token, _ = Token.objects.get_or_create(user=user)
+
+        overrides = {} if options['with_cache'] else {
+            'CACHES': {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+        }
+        with override_settings(**overrides):
+            results = asyncio.run(self.run_all(user, token.key, options['requests'], options['concurrency']))
+
+        report = build_report(
+            'async', results,
+            requests=options['requests'],
+            concurrency=options['concurrency'],
+            cache=options['with_cache'],
+        )
+        write_report(options['output'], report)
+        self.stdout.write(self.style.SUCCESS(f"Report written to {options['output']}"))
+
+    async def run_all(self, user, key, total, concurrency):
+        results = {}
+        for name, sync_path, async_path in ENDPOINTS:
+            for mode, path in (('sync', sync_path), ('async', async_path)):
+                url = path.format(user_id=user.id)
+                results[f'{name}:{mode}'] = result = await self.run_one(url, key, total, concurrency)
+                await sync_to_async(self.stdout.write)(f"{name}:{mode}: {result}")
+        return results
+
+    async def run_one(self, url, key, total, concurrency):
+        client = AsyncClient()
+        headers = {'Authorization': f'Token {key}'}
+        semaphore = asyncio.Semaphore(concurrency)
+        timings, statuses = [], set()
+
+        async def one():
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.get(url, headers=headers, secure=True)
+                timings.append((time.perf_counter() - start) * 1000)
+                statuses.add(response.status_code)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(total)))
+        elapsed = time.perf_counter() - start
+
+        result = summarize(timings)
+        result['throughput_rps'] = round(total / elapsed, 1)
+        result['statuses'] = sorted(statuses)
+        return result
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from posts.counters import rebuild_post_counters, rebuild_comment_counters, rebuild_follow_counters
+
+
+class Command(BaseCommand):
+    help = "Recompute the denormalized like/comment/follow counters from the source tables."
+
+    def handle(self, *args, **options):
+        posts = rebuild_post_counters()
+        comments = rebuild_comment_counters()
+        profiles = rebuild_follow_counters()
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt counters for {posts} posts, {comments} comments and {profiles} user profiles."
+        ))
@@ -0,0 +1,31 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.models import Follow
+from posts.timeline import get_timeline_store, backfill_timeline
+
+
+class Command(BaseCommand):
+    help = "Rebuild the materialized 'followed' timelines from the follow graph."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, help="Only rebuild this user's timeline.")
+
+    def handle(self, *args, **options):
+        store = get_timeline_store()
+        if store is None:
+            raise CommandError("FEED_TIMELINE_BACKEND is not configured.")
+
+        users = User.objects.all()
+        if options['user']:
+            users = users.filter(id=options['user'])
+
+        rebuilt = 0
+        for user_id in users.values_list('id', flat=True).iterator():
+            store.clear(user_id)
+            followed = Follow.objects.filter(follower_id=user_id).values_list('followed_id', flat=True)
+            for author_id in followed:
+                backfill_timeline(user_id, author_id)
+            rebuilt += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rebuilt} timelines."))
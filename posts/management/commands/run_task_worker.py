@@ -0,0 +1,31 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.tasks import run_due_tasks, run_worker
+
+
+class Command(BaseCommand):
+    help = "Run queued background tasks (TASK_QUEUE_BACKEND = 'db'), once or continuously."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Run the tasks due now and exit.")
+        parser.add_argument('--batch', type=int, default=100, help="Tasks claimed per iteration.")
+        parser.add_argument('--interval', type=float, default=None, help="Seconds to sleep when idle.")
+
+    def handle(self, *args, **options):
+        if getattr(settings, 'TASK_QUEUE_BACKEND', None) != 'db':
+            raise CommandError("Only the 'db' task queue has a separate worker; set TASK_QUEUE_BACKEND = 'db'.")
+
+        if options['once']:
+            total_ok = total_failed = 0
+            while True:
+                succeeded, failed = run_due_tasks(options['batch'])
+                if not succeeded and not failed:
+                    break
+                total_ok += succeeded
+                total_failed += failed
+            self.stdout.write(self.style.SUCCESS(f"Ran {total_ok} tasks, {total_failed} failed."))
+        else:
+            interval = options['interval'] or getattr(settings, 'TASK_POLL_INTERVAL', 1)
+            self.stdout.write(f"Running queued tasks (polling every {interval}s)...")
+            run_worker(interval, options['batch'])
@@ -0,0 +1,66 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.core.cache import cache
+from django.db import connections
+
+from posts.feed_cache import bump_global_feed_generation, get_feed_generation
+
+SYNCED_GENERATION_KEY = 'replica:synced-generation'
+
+
+class Command(BaseCommand):
+    help = (
+        "Copy the primary SQLite database to REPLICA_DATABASE_PATH with the online "
+        "backup API (once, or every --interval seconds with --loop). Stands in for "
+        "asynchronous replication when testing replica routing locally."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true')
+        parser.add_argument('--interval', type=float, default=None)
+
+    def handle(self, *args, **options):
+        target = getattr(settings, 'REPLICA_DATABASE_PATH', None)
+        if not target:
+            raise CommandError("REPLICA_DATABASE_PATH is not set.")
+        if connections['default'].vendor != 'sqlite':
+            raise CommandError("sync_replica only supports a SQLite primary.")
+        source = str(settings.DATABASES['default']['NAME'])
+
+        interval = options['interval'] or getattr(settings, 'REPLICA_SYNC_INTERVAL', 5)
+        while True:
+            started = time.perf_counter()
+            self.sync(source, target)
+            self.stdout.write(f"Replica synced in {(time.perf_counter() - started) * 1000:.0f} ms")
+            if not options['loop']:
+                break
+            time.sleep(interval)
+
+    def sync(self, source, target):
+        # Any write since the last sync bumped the global generation; read it
+        # before copying, so writes racing the copy are caught next time
+        generation = get_feed_generation()
+        # Backing up straight into the live replica: the copy commits as one
+        # write transaction, and open read connections notice the changed file
+        # and drop their page cache, so persistent connections stay current.
+        src = sqlite3.connect(source)
+        dst = sqlite3.connect(target, timeout=20)
+        try:
+            src.backup(dst)
+            # A WAL primary's header is copied too; the replica is opened
+            # read-only and must not need -wal/-shm files
+            dst.execute('PRAGMA journal_mode=DELETE')
+        finally:
+            dst.close()
+            src.close()
+        # Feed pages built from the stale replica may have been cached under the
+        # current generation; move on so they're rebuilt from the fresh copy.
+        # Without writes since the last sync the replica wasn't stale: keep them.
+        if generation != cache.get(SYNCED_GENERATION_KEY):
+            bump_global_feed_generation()
+            # What the generation is if nothing else bumped it meanwhile; a bump
+            # racing the copy makes the next sync invalidate again
+            cache.set(SYNCED_GENERATION_KEY, str(int(generation) + 1), timeout=None)
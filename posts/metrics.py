@@ -0,0 +1,103 @@
+"""
+Per-request instrumentation: SQL query count and time, cache hits/misses and
+named timings (auth, serialization, ...). RequestMetricsMiddleware creates a
+RequestMetrics for sampled requests; code anywhere in the request can add to
+it through the helpers below, which are no-ops for unsampled requests.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+_current_metrics = ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.queries = 0
+        self.db_ms = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.timings = {}
+
+    def db_wrapper(self, execute, sql, params, many, context):
+        """connection.execute_wrapper hook timing every query."""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_ms += (time.perf_counter() - start) * 1000
+
+    def add_timing(self, name, ms):
+        self.timings[name] = self.timings.get(name, 0.0) + ms
+
+    def server_timing(self, total_ms):
+        """Value for the Server-Timing response header."""
+        entries = [
+            f'total;dur={total_ms:.1f}',
+            f'db;dur={self.db_ms:.1f};desc="{self.queries} queries"',
+        ]
+        entries += [f'{name};dur={ms:.1f}' for name, ms in self.timings.items()]
+        if self.cache_hits or self.cache_misses:
+            entries.append(f'cache;desc="{self.cache_hits} hit, {self.cache_misses} miss"')
+        return ', '.join(entries)
+
+    def as_fields(self, total_ms):
+        fields = {
+            'total_ms': round(total_ms, 2),
+            'queries': self.queries,
+            'db_ms': round(self.db_ms, 2),
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+        }
+        fields.update({f'{name}_ms': round(ms, 2) for name, ms in self.timings.items()})
+        return fields
+
+
+def current_metrics():
+    return _current_metrics.get()
+
+
+def activate(metrics):
+    return _current_metrics.set(metrics)
+
+
+def deactivate(token):
+    _current_metrics.reset(token)
+
+
+def record_cache(hit):
+    metrics = _current_metrics.get()
+    if metrics is not None:
+        if hit:
+            metrics.cache_hits += 1
+        else:
+            metrics.cache_misses += 1
+
+
+@contextmanager
+def timed(name):
+    """Add the duration of the block to the current request's `name` timing."""
+    metrics = _current_metrics.get()
+    if metrics is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.add_timing(name, (time.perf_counter() - start) * 1000)
+
+
+class InstrumentedViewMixin:
+    """
+    DRF view mixin recording authentication/permission time and exposing
+    `self.timed(name)` for view-specific phases such as serialization.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        with timed('auth'):
+            super().initial(request, *args, **kwargs)
+
+    def timed(self, name):
+        return timed(name)
@@ -0,0 +1,77 @@
+import random
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+
+from singletons.logger_singleton import LoggerSingleton
+from .metrics import RequestMetrics, activate, deactivate
+
+
+class RequestMetricsMiddleware:
+    """
+    Records query count, DB time, cache hits/misses and view timings for a
+    sample of requests (REQUEST_METRICS_SAMPLE_RATE) and reports them as a
+    Server-Timing header and a structured log line.
+
+    Works in both sync and async stacks so async views stay async under ASGI.
+    For async views the ORM runs queries on a worker thread whose connection
+    isn't wrapped, so only timings and cache counters are reported there.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.logger = LoggerSingleton().get_logger()
+        self.async_mode = iscoroutinefunction(self.get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def sampled(self):
+        sample_rate = getattr(settings, 'REQUEST_METRICS_SAMPLE_RATE', 0.0)
+        return sample_rate > 0 and random.random() < sample_rate
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not self.sampled():
+            return self.get_response(request)
+
+        metrics = RequestMetrics()
+        token = activate(metrics)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(metrics.db_wrapper))
+                response = self.get_response(request)
+        finally:
+            deactivate(token)
+        return self.report(request, response, metrics, start)
+
+    async def __acall__(self, request):
+        if not self.sampled():
+            return await self.get_response(request)
+
+        metrics = RequestMetrics()
+        token = activate(metrics)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            deactivate(token)
+        return self.report(request, response, metrics, start)
+
+    def report(self, request, response, metrics, start):
+        total_ms = (time.perf_counter() - start) * 1000
+        response['Server-Timing'] = metrics.server_timing(total_ms)
+        fields = metrics.as_fields(total_ms)
+        fields.update(method=request.method, path=request.path, status=response.status_code)
+        self.logger.info(
+            "request_metrics " + ' '.join(f"{k}={v}" for k, v in fields.items()),
+            extra={'request_metrics': fields}
+        )
+        return response
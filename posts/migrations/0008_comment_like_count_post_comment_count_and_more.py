@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:50
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    Comment = apps.get_model('posts', 'Comment')
+    PostLike = apps.get_model('posts', 'PostLike')
+    CommentLike = apps.get_model('posts', 'CommentLike')
+
+    def count_of(model, fk):
+        return Coalesce(Subquery(
+            model.objects.filter(**{fk: OuterRef('pk')})
+            .values(fk).annotate(c=Count('pk')).values('c')
+        ), 0)
+
+    Post.objects.update(
+        like_count=count_of(PostLike, 'post'),
+        comment_count=count_of(Comment, 'post'),
+    )
+    Comment.objects.update(like_count=count_of(CommentLike, 'comment'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0007_post_privacy_userprofile'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='like_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='like_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:02
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_follow_counts(apps, schema_editor):
+    Follow = apps.get_model('posts', 'Follow')
+    UserProfile = apps.get_model('posts', 'UserProfile')
+
+    # Every user on either side of a follow needs a profile to hold the counts
+    user_ids = set(Follow.objects.values_list('follower_id', flat=True)) | \
+        set(Follow.objects.values_list('followed_id', flat=True))
+    existing = set(UserProfile.objects.values_list('user_id', flat=True))
+    UserProfile.objects.bulk_create([UserProfile(user_id=uid) for uid in user_ids - existing])
+
+    def count_of(fk):
+        return Coalesce(Subquery(
+            Follow.objects.filter(**{fk: OuterRef('user_id')})
+            .values(fk).annotate(c=Count('pk')).values('c')
+        ), 0)
+
+    UserProfile.objects.update(
+        follower_count=count_of('followed'),
+        following_count=count_of('follower'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0010_feed_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='follow',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='follower_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='following_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='follow',
+            index=models.Index(fields=['followed', '-created_at', '-id'], name='follow_followed_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='follow',
+            index=models.Index(fields=['follower', '-created_at', '-id'], name='follow_follower_created_idx'),
+        ),
+        migrations.RunPython(backfill_follow_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:03
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+# The posts/ranking.py formula with its default settings, frozen here;
+# `manage.py decay_scores` re-applies the configured one
+COMMENT_WEIGHT = 2.0
+GRAVITY = 1.8
+SCORE_WINDOW = timedelta(days=7)
+
+
+def backfill_scores(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    now = timezone.now()
+    posts = list(Post.objects.filter(created_at__gte=now - SCORE_WINDOW)
+                 .only('id', 'like_count', 'comment_count', 'created_at'))
+    for post in posts:
+        age_hours = max((now - post.created_at).total_seconds() / 3600, 0)
+        points = post.like_count + COMMENT_WEIGHT * post.comment_count
+        post.engagement_score = points / (age_hours + 2) ** GRAVITY
+    Post.objects.bulk_update(posts, ['engagement_score'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0011_follow_counts'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='engagement_score',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['privacy', '-engagement_score', '-id'], name='post_privacy_score_idx'),
+        ),
+        migrations.RunPython(backfill_scores, migrations.RunPython.noop),
+    ]
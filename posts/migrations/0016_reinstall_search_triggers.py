@@ -0,0 +1,52 @@
+"""
+Recreate the FTS5 sync triggers from 0013.
+
+0014 added Post.updated_at, which makes SQLite rebuild posts_post; dropping
+the old table dropped its triggers, so new and edited posts stopped being
+indexed. The index is rebuilt from the source tables afterwards. No-op on
+other databases.
+"""
+from django.db import migrations
+
+FTS_TABLES = {
+    # fts table: (source table, indexed columns)
+    'posts_post_fts': ('posts_post', ('title', 'content')),
+    'posts_comment_fts': ('posts_comment', ('text',)),
+}
+
+
+def reinstall_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for fts, (table, columns) in FTS_TABLES.items():
+        cols = ', '.join(columns)
+        new_cols = ', '.join(f'new.{c}' for c in columns)
+        old_cols = ', '.join(f'old.{c}' for c in columns)
+        for suffix in ('ai', 'ad', 'au'):
+            schema_editor.execute(f"DROP TRIGGER IF EXISTS {fts}_{suffix}")
+        schema_editor.execute(
+            f"CREATE TRIGGER {fts}_ai AFTER INSERT ON {table} BEGIN "
+            f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_cols}); END"
+        )
+        schema_editor.execute(
+            f"CREATE TRIGGER {fts}_ad AFTER DELETE ON {table} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_cols}); END"
+        )
+        # Only text changes re-index; counter/score updates don't touch the index
+        schema_editor.execute(
+            f"CREATE TRIGGER {fts}_au AFTER UPDATE OF {cols} ON {table} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_cols}); "
+            f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_cols}); END"
+        )
+        schema_editor.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0015_task'),
+    ]
+
+    operations = [
+        migrations.RunPython(reinstall_triggers, migrations.RunPython.noop),
+    ]
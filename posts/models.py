@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.utils import timezone
 
 class UserProfile(models.Model):
     ROLE_CHOICES = [
@@ -9,6 +10,9 @@ class UserProfile(models.Model):
     ]
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='profile')
     role = models.CharField(max_length=10, choices=ROLE_CHOICES, default='user')
+    # Denormalized from Follow (see posts/counters.py)
+    follower_count = models.PositiveIntegerField(default=0)
+    following_count = models.PositiveIntegerField(default=0)
 
     def __str__(self):
         return f"{self.user.username} ({self.role})"
@@ -31,12 +35,36 @@ class Post(models.Model):
     metadata = models.JSONField(null=True, blank=True)
     author = models.ForeignKey(User, on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Also bumped when likes/comments change (see posts/counters.py); feeds ETags
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.title} by {self.author.username}"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Lets post_save tell when a post became public (timeline fan-out)
+        instance._loaded_privacy = instance.__dict__.get('privacy')
+        return instance
     
     likes = models.ManyToManyField(User, through='PostLike', related_name='liked_posts')
     privacy = models.CharField(max_length=10, choices=PRIVACY_CHOICES, default='public')
+
+    # Denormalized counters, kept in sync by posts/signals.py
+    like_count = models.PositiveIntegerField(default=0)
+    comment_count = models.PositiveIntegerField(default=0)
+    # Time-decayed ranking for the 'top' feed (see posts/ranking.py)
+    engagement_score = models.FloatField(default=0)
+
+    class Meta:
+        # Match FeedFactory's access patterns: filter on privacy and/or author,
+        # newest first or highest score first
+        indexes = [
+            models.Index(fields=['privacy', '-created_at', '-id'], name='post_privacy_created_idx'),
+            models.Index(fields=['author', 'privacy', '-created_at', '-id'], name='post_author_privacy_idx'),
+            models.Index(fields=['privacy', '-engagement_score', '-id'], name='post_privacy_score_idx'),
+        ]
     
        
 class Comment(models.Model):
@@ -44,6 +72,13 @@ class Comment(models.Model):
     author = models.ForeignKey(User, related_name='comments', on_delete=models.CASCADE)
     post = models.ForeignKey(Post, related_name='comments', on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
+    like_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        # Keyset pagination of /api/comments/ (newest first)
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='comment_created_idx'),
+        ]
 
     def __str__(self):
         return f"Comment by {self.author.username} on {self.post.title}"
@@ -56,6 +91,9 @@ class PostLike(models.Model):
 
     class Meta:
         unique_together = ('user', 'post')
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='postlike_created_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} liked {self.post.title}"
@@ -67,6 +105,9 @@ class CommentLike(models.Model):
 
     class Meta:
         unique_together = ('user', 'comment')
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='commentlike_created_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} liked comment #{self.comment.id}"
@@ -74,9 +115,70 @@ class CommentLike(models.Model):
 class Follow(models.Model):
     follower = models.ForeignKey(User, related_name='followers', on_delete=models.CASCADE)
     followed = models.ForeignKey(User, related_name='following', on_delete=models.CASCADE)
+    created_at = models.DateTimeField(default=timezone.now)
 
     class Meta:
         unique_together = ('follower', 'followed')
+        indexes = [
+            # Reverse lookups: "who follows this user"
+            models.Index(fields=['followed', 'follower'], name='follow_followed_follower_idx'),
+            # Follower/following lists, newest first (cursor pagination)
+            models.Index(fields=['followed', '-created_at', '-id'], name='follow_followed_created_idx'),
+            models.Index(fields=['follower', '-created_at', '-id'], name='follow_follower_created_idx'),
+        ]
 
     def __str__(self):
         return f"{self.follower.username} follows {self.followed.username}"
+
+
+class TimelineEntry(models.Model):
+    """
+    Materialized 'followed' timeline row (fan-out on write), used when
+    FEED_TIMELINE_BACKEND = 'db'. `created_at` is copied from the post so the
+    timeline can be read in order without touching the posts table.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='timeline_entries')
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='timeline_entries')
+    created_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ('user', 'post')
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='timeline_user_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"Post #{self.post_id} in {self.user_id}'s timeline"
+
+
+
+class Task(models.Model):
+    """
+    Queued background task for TASK_QUEUE_BACKEND = 'db' (posts/tasks.py).
+    Deleted once it succeeds; kept with status 'failed' after its last attempt.
+    """
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (FAILED, 'Failed'),
+    )
+    name = models.CharField(max_length=200)
+    args = models.JSONField(default=list)
+    kwargs = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    attempts = models.PositiveIntegerField(default=0)
+    # Next time the task is due; while running, when its claim expires
+    run_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'run_at'], name='task_status_run_at_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.id} ({self.status})"
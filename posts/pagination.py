@@ -0,0 +1,208 @@
+import base64
+import json
+from collections import OrderedDict
+from datetime import datetime
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.paginator import InvalidPage
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination, _positive_int
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from singletons.config_manager import ConfigManager
+
+
+class FeedPagination(PageNumberPagination):
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """Async counterpart of paginate_queryset using the async ORM."""
+        self.request = request
+        page_size = self.get_page_size(request)
+        paginator = self.django_paginator_class(queryset, page_size)
+        # Prime the cached count so paginator.page() doesn't run a sync query
+        paginator.__dict__['count'] = await queryset.acount()
+        page_number = self.get_page_number(request, paginator)
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            raise NotFound(self.invalid_page_message.format(page_number=page_number, message=str(exc)))
+        self.page.object_list = [obj async for obj in self.page.object_list]
+        return list(self.page)
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (seek) pagination driven by the queryset's own ordering.
+
+    The queryset must be ordered by one column plus ``id`` as a tie-breaker,
+    e.g. ``order_by('-created_at', '-id')``, or by ``id`` alone. Each page is a range read
+    ``WHERE (created_at, id) < (cursor)``, so there is no COUNT(*) and no
+    OFFSET scan and deep pages cost the same as the first one.
+
+    The cursor holds the ordering value of the last row seen. With a column
+    that changes (the 'top' feed's engagement_score), a row whose value moves
+    across the cursor between two requests is skipped or shown twice.
+    """
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        page_queryset = self.get_page_queryset(queryset, request)
+        return self.build_page(list(page_queryset))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        page_queryset = self.get_page_queryset(queryset, request)
+        return self.build_page([obj async for obj in page_queryset])
+
+    def get_page_queryset(self, queryset, request):
+        """
+        Return the sliced queryset for the requested page (page_size + 1 rows
+        so we can tell whether there is another page without counting).
+        """
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.field, self.descending = self.get_ordering(queryset)
+        self.model = queryset.model
+        self.cursor = self.decode_cursor(request)
+
+        if self.cursor is not None:
+            value, pk, reverse = self.cursor
+            # Going backwards means seeking in the opposite direction
+            seek_lower = self.descending != reverse
+            lookup = 'lt' if seek_lower else 'gt'
+            # The redundant inclusive bound lets the database seek the index to
+            # the cursor; the OR alone makes it scan down from the first row
+            queryset = queryset.filter(**{f'{self.field}__{lookup}e': value}).filter(
+                Q(**{f'{self.field}__{lookup}': value}) |
+                Q(**{self.field: value, f'id__{lookup}': pk})
+            )
+            if reverse:
+                queryset = queryset.reverse()
+
+        return queryset[:self.page_size + 1]
+
+    def build_page(self, rows):
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        reverse = bool(self.cursor and self.cursor[2])
+        if reverse:
+            rows.reverse()
+            self.has_next = True
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = self.cursor is not None
+
+        self.rows = rows
+        return rows
+
+    def get_ordering(self, queryset):
+        ordering = list(queryset.query.order_by)
+        if len(ordering) == 1 and ordering[0].lstrip('-') in ('id', 'pk'):
+            return 'id', ordering[0].startswith('-')
+        if len(ordering) != 2 or ordering[1].lstrip('-') not in ('id', 'pk'):
+            raise ValueError(
+                "KeysetPagination needs a queryset ordered by (<field>, id), got %r" % (ordering,)
+            )
+        field, tie_breaker = ordering
+        descending = field.startswith('-')
+        if descending != tie_breaker.startswith('-'):
+            raise ValueError("Both ordering fields must sort in the same direction.")
+        return field.lstrip('-'), descending
+
+    def get_page_size(self, request):
+        if self.page_size_query_param:
+            try:
+                return _positive_int(
+                    request.query_params[self.page_size_query_param],
+                    strict=True,
+                    cutoff=self.max_page_size
+                )
+            except (KeyError, ValueError):
+                pass
+        return self.page_size
+
+    # -----------------------------
+    #   CURSOR ENCODING
+    # -----------------------------
+    def encode_cursor(self, row, reverse=False):
+        value = getattr(row, self.field)
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        payload = {'v': value, 'id': row.pk}
+        if reverse:
+            payload['r'] = 1
+        raw = json.dumps(payload, separators=(',', ':')).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+            value, pk = payload['v'], int(payload['id'])
+            value = self.parse_value(value)
+        except (TypeError, ValueError, KeyError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        return value, pk, bool(payload.get('r'))
+
+    def parse_value(self, value):
+        try:
+            field = self.model._meta.get_field(self.field)
+        except FieldDoesNotExist:
+            # Annotations (e.g. a rank) are plain numbers
+            return float(value)
+        parsed = field.to_python(value)
+        if parsed is None:
+            raise ValueError("Empty cursor value")
+        return parsed
+
+    # -----------------------------
+    #   RESPONSE
+    # -----------------------------
+    def get_next_link(self):
+        if not self.has_next or not self.rows:
+            return None
+        return self._link(self.encode_cursor(self.rows[-1]))
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.rows:
+            return None
+        return self._link(self.encode_cursor(self.rows[0], reverse=True))
+
+    def _link(self, cursor):
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, 'page')
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+
+class FeedCursorPagination(KeysetPagination):
+    page_size = 10
+    max_page_size = 100
+
+
+class CommentCursorPagination(KeysetPagination):
+    page_size = 20
+    max_page_size = 100
+
+
+class ListCursorPagination(KeysetPagination):
+    """Default pagination for the plain list endpoints (users, comments, likes)."""
+    page_size = ConfigManager().get_setting("DEFAULT_PAGE_SIZE")
+    max_page_size = 100
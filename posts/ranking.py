@@ -0,0 +1,75 @@
+"""
+Time-decayed engagement scores for the 'top' feed.
+
+    score = (likes + ENGAGEMENT_COMMENT_WEIGHT * comments) / (age_hours + 2) ** ENGAGEMENT_GRAVITY
+
+The score is stored on Post.engagement_score so ranking is an index scan.
+It is recomputed for a post whenever its like/comment counters change, and
+`manage.py decay_scores` periodically re-applies the time decay; posts older
+than ENGAGEMENT_SCORE_WINDOW_DAYS drop to 0 and stop being recomputed.
+Because scores move, cursor pages of the 'top' feed are not a stable
+snapshot: a post can be skipped or repeated when its score changes between
+requests (see KeysetPagination).
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import Post
+
+SCORE_FIELDS = ('id', 'like_count', 'comment_count', 'created_at')
+
+
+def get_comment_weight():
+    return getattr(settings, 'ENGAGEMENT_COMMENT_WEIGHT', 2.0)
+
+
+def get_gravity():
+    return getattr(settings, 'ENGAGEMENT_GRAVITY', 1.8)
+
+
+def get_score_window():
+    return timedelta(days=getattr(settings, 'ENGAGEMENT_SCORE_WINDOW_DAYS', 7))
+
+
+def engagement_score(like_count, comment_count, created_at, now=None):
+    now = now or timezone.now()
+    if now - created_at > get_score_window():
+        return 0.0
+    age_hours = max((now - created_at).total_seconds() / 3600, 0)
+    points = like_count + get_comment_weight() * comment_count
+    return points / (age_hours + 2) ** get_gravity()
+
+
+def recompute_engagement_scores(queryset, now=None, batch_size=1000):
+    """Recompute and store the score of every post in `queryset`. Returns the count."""
+    now = now or timezone.now()
+    batch, updated = [], 0
+    for post in queryset.only(*SCORE_FIELDS).iterator(chunk_size=batch_size):
+        post.engagement_score = engagement_score(post.like_count, post.comment_count, post.created_at, now)
+        batch.append(post)
+        if len(batch) >= batch_size:
+            updated += Post.objects.bulk_update(batch, ['engagement_score'])
+            batch = []
+    if batch:
+        updated += Post.objects.bulk_update(batch, ['engagement_score'])
+    return updated
+
+
+def refresh_engagement_score(post_id):
+    """Incremental path: one post after a like or comment was written."""
+    row = Post.objects.filter(pk=post_id).values_list('like_count', 'comment_count', 'created_at').first()
+    if row is not None:
+        Post.objects.filter(pk=post_id).update(engagement_score=engagement_score(*row))
+
+
+def decay_engagement_scores(now=None):
+    """
+    Periodic job: re-apply the time decay to posts inside the scoring window
+    and zero the ones that just left it. Returns the number of posts updated.
+    """
+    now = now or timezone.now()
+    cutoff = now - get_score_window()
+    expired = Post.objects.filter(created_at__lt=cutoff, engagement_score__gt=0).update(engagement_score=0)
+    return expired + recompute_engagement_scores(Post.objects.filter(created_at__gte=cutoff), now)
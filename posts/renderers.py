@@ -0,0 +1,42 @@
+"""
+JSON rendering for the hot read endpoints.
+
+FastJSONRenderer encodes with orjson when it is installed (several times
+faster than the stdlib encoder on nested feed pages) and falls back to DRF's
+JSONRenderer otherwise, so the dependency stays optional. It is the default
+renderer (REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES']) and is also used by
+the async views and the NDJSON export.
+
+The output is byte-for-byte DRF's (compact separators, unescaped unicode,
+U+2028/U+2029 escaped for JavaScript) with one exception: NaN and
+infinities render as null, where DRF's STRICT_JSON raises ValueError.
+orjson has no strict mode, and the API serializes no float fields.
+"""
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        # Indented output (browsable API, ?indent) keeps DRF's encoder
+        if orjson is None or self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        # Datetimes etc. go through DRF's encoder so the output format is unchanged
+        ret = orjson.dumps(
+            data,
+            default=self.encoder_class().default,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME,
+        )
+        # Valid JSON but not valid JavaScript; DRF escapes them too
+        return ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
+
+
+def render_json(data):
+    return FastJSONRenderer().render(data)
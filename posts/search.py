@@ -0,0 +1,128 @@
+"""
+Full-text search over posts and comments.
+
+On SQLite the queries join the FTS5 tables created by migration 0013 and are
+ranked by bm25 (lower is better), so results come from the inverted index
+instead of a LIKE scan. Elsewhere they fall back to icontains, newest first.
+Both return querysets ordered by (<field>, id) for KeysetPagination.
+"""
+import re
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from .models import Post, Comment
+
+TERM_RE = re.compile(r'\w+', re.UNICODE)
+
+FTS_TABLES = {
+    # fts table: (source table, indexed columns)
+    'posts_post_fts': ('posts_post', ('title', 'content')),
+    'posts_comment_fts': ('posts_comment', ('text',)),
+}
+
+
+def fts_available():
+    return connection.vendor == 'sqlite'
+
+
+def install_search_index(conn):
+    """
+    Create the FTS5 tables and their sync triggers where missing, and rebuild
+    an index whose triggers had to be recreated. SQLite drops triggers when a
+    migration rebuilds the source table, so this also runs after every
+    migrate (see PostsConfig.ready). Returns the tables that were rebuilt.
+    """
+    if conn.vendor != 'sqlite':
+        return []
+    rebuilt = []
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'trigger')")
+        existing = {row[0] for row in cursor.fetchall()}
+        for fts, (table, columns) in FTS_TABLES.items():
+            if table not in existing:
+                continue
+            cols = ', '.join(columns)
+            new_cols = ', '.join(f'new.{c}' for c in columns)
+            old_cols = ', '.join(f'old.{c}' for c in columns)
+            statements = {
+                fts: f"CREATE VIRTUAL TABLE {fts} USING fts5({cols}, content='{table}', "
+                     f"content_rowid='id', tokenize='porter unicode61')",
+                f'{fts}_ai': f"CREATE TRIGGER {fts}_ai AFTER INSERT ON {table} BEGIN "
+                             f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_cols}); END",
+                f'{fts}_ad': f"CREATE TRIGGER {fts}_ad AFTER DELETE ON {table} BEGIN "
+                             f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_cols}); END",
+                # Only text changes re-index; counter/score updates don't touch the index
+                f'{fts}_au': f"CREATE TRIGGER {fts}_au AFTER UPDATE OF {cols} ON {table} BEGIN "
+                             f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_cols}); "
+                             f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_cols}); END",
+            }
+            missing = [name for name in statements if name not in existing]
+            for name in missing:
+                cursor.execute(statements[name])
+            if missing:
+                cursor.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+                rebuilt.append(fts)
+    return rebuilt
+
+
+def search_terms(query):
+    return TERM_RE.findall(query or '')
+
+
+def fts_query(terms):
+    """
+    Build an FTS5 MATCH expression from plain words: every term must match,
+    the last one as a prefix (search-as-you-type). Quoting keeps user input
+    from being parsed as FTS syntax (NEAR, column filters, ...).
+    """
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += '*'
+    return ' '.join(quoted)
+
+
+def _fts_search(queryset, fts_table, terms):
+    source = queryset.model._meta.db_table
+    return queryset.extra(
+        tables=[fts_table],
+        where=[f'{fts_table}.rowid = {source}.id', f'{fts_table} MATCH %s'],
+        params=[fts_query(terms)],
+    ).annotate(rank=RawSQL(f'bm25({fts_table})', ())).order_by('rank', 'id')
+
+
+def visible_posts(user):
+    """Same privacy rule as FeedFactory: public posts plus the user's own."""
+    if getattr(user, 'is_authenticated', False):
+        return Post.objects.filter(Q(privacy='public') | Q(author_id=user.id))
+    return Post.objects.filter(privacy='public')
+
+
+def search_posts(user, query):
+    terms = search_terms(query)
+    posts = visible_posts(user)
+    if not terms:
+        return posts.none().order_by('-created_at', '-id')
+    if fts_available():
+        return _fts_search(posts, 'posts_post_fts', terms)
+    match = Q()
+    for term in terms:
+        match &= Q(title__icontains=term) | Q(content__icontains=term)
+    return posts.filter(match).order_by('-created_at', '-id')
+
+
+def search_comments(user, query):
+    terms = search_terms(query)
+    if getattr(user, 'is_authenticated', False):
+        comments = Comment.objects.filter(Q(post__privacy='public') | Q(post__author_id=user.id))
+    else:
+        comments = Comment.objects.filter(post__privacy='public')
+    comments = comments.select_related('author')
+    if not terms:
+        return comments.none().order_by('-created_at', '-id')
+    if fts_available():
+        return _fts_search(comments, 'posts_comment_fts', terms)
+    match = Q()
+    for term in terms:
+        match &= Q(text__icontains=term)
+    return comments.filter(match).order_by('-created_at', '-id')
@@ -1,5 +1,7 @@
 from rest_framework import serializers
-from .models import User, Post, Comment, PostLike, CommentLike
+from .models import User, Post, Comment, PostLike, CommentLike, Follow
+from .like_buffer import pending_likes_for
+from factories.feed_factory import FeedFactory
 
 
 
@@ -28,10 +30,19 @@ class CommentSerializer(serializers.ModelSerializer):
             validated_data['author'] = request.user
         return super().create(validated_data)
        
+class PostListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        # Fetch likes still sitting in the write-behind buffer for the whole
+        # page at once (no-op when buffering is off)
+        posts = list(data.all() if hasattr(data, 'all') else data)
+        self._context.setdefault('pending_likes', pending_likes_for([post.id for post in posts]))
+        return super().to_representation(posts)
+
+
 class PostSerializer(serializers.ModelSerializer):
     author = serializers.StringRelatedField()
-    comments = CommentSerializer(many=True, read_only=True)
-    comment_count = serializers.SerializerMethodField()
+    comments = serializers.SerializerMethodField()
+    comment_count = serializers.IntegerField(read_only=True)
     likes = serializers.SerializerMethodField()
     like_count = serializers.SerializerMethodField()
 
@@ -39,6 +50,7 @@ class PostSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Post
+        list_serializer_class = PostListSerializer
         fields = [
             'id',
             'title',
@@ -53,17 +65,89 @@ class PostSerializer(serializers.ModelSerializer):
             'privacy'
         ]
 
-    def get_comment_count(self, obj):
-        return obj.comments.count()
-
-    def get_like_count(self, obj):
-        # Use the through model related name to count likes
-        return obj.post_likes_related.count()
+    def get_comments(self, obj):
+        # Only the latest few comments are embedded; FeedFactory.with_relations
+        # prefetches them for a whole page at once.
+        comments = getattr(obj, 'latest_comments', None)
+        if comments is None:
+            comments = obj.comments.select_related('author') \
+                .order_by('-created_at', '-id')[:FeedFactory.embedded_comments_limit()]
+        return CommentSerializer(comments, many=True).data
+
+    def _pending_likes(self, obj):
+        pending = self.context.get('pending_likes')
+        if pending is None:
+            pending = pending_likes_for([obj.id])
+        return pending.get(obj.id, ())
+
+    def _unflushed_likes(self, obj, pending):
+        # Buffered likes that aren't persisted yet (a flush may have raced us)
+        persisted = {pl.user_id for pl in obj.post_likes_related.all()}
+        return [(uid, name) for uid, name in pending if uid not in persisted]
 
     def get_likes(self, obj):
         # Return the usernames of users who liked the post, using the through model data
-        return [pl.user.username for pl in obj.post_likes_related.all()]
+        likes = [pl.user.username for pl in obj.post_likes_related.all()]
+        pending = self._pending_likes(obj)
+        if pending:
+            likes += [name for _, name in self._unflushed_likes(obj, pending)]
+        return likes
 
+    def get_like_count(self, obj):
+        pending = self._pending_likes(obj)
+        if not pending:
+            return obj.like_count
+        return obj.like_count + len(self._unflushed_likes(obj, pending))
+
+
+_datetime = serializers.DateTimeField()
+
+
+class CompactPostSerializer(PostSerializer):
+    """
+    PostSerializer with users referenced by id in `author`, `likes` and the
+    embedded comments. Usernames are side-loaded once per response (see
+    `compact_page`) instead of being repeated per post, comment and like.
+    """
+    author = serializers.IntegerField(source='author_id', read_only=True)
+
+    def get_comments(self, obj):
+        comments = getattr(obj, 'latest_comments', None)
+        if comments is None:
+            comments = obj.comments.select_related('author') \
+                .order_by('-created_at', '-id')[:FeedFactory.embedded_comments_limit()]
+        return [
+            {'id': c.id, 'text': c.text, 'author': c.author_id, 'created_at': _datetime.to_representation(c.created_at)}
+            for c in comments
+        ]
+
+    def get_likes(self, obj):
+        likes = [pl.user_id for pl in obj.post_likes_related.all()]
+        pending = self._pending_likes(obj)
+        if pending:
+            likes += [uid for uid, _ in self._unflushed_likes(obj, pending)]
+        return likes
+
+
+def compact_page(posts):
+    """
+    Serialize a page of posts in the compact format. Returns (results, users)
+    where `users` maps every referenced user id to its username, built from
+    the already loaded authors, likers and commenters (no extra queries).
+    """
+    posts = list(posts)
+    serializer = CompactPostSerializer(posts, many=True)
+    results = serializer.data
+    users = {}
+    for post in posts:
+        users[post.author_id] = post.author.username
+        for like in post.post_likes_related.all():
+            users[like.user_id] = like.user.username
+        for comment in getattr(post, 'latest_comments', ()):
+            users[comment.author_id] = comment.author.username
+    for pending in serializer.context.get('pending_likes', {}).values():
+        users.update(pending)
+    return results, {str(user_id): name for user_id, name in users.items()}
 
 
 class PostLikeSerializer(serializers.ModelSerializer):
@@ -132,4 +216,26 @@ class CommentLikeSerializer(serializers.ModelSerializer):
         request = self.context.get('request')
         if request and hasattr(request, 'user'):
             validated_data['user'] = request.user
-        return super().create(validated_data)
\ No newline at end of file
+        return super().create(validated_data)
+
+
+class FollowerSerializer(serializers.ModelSerializer):
+    """One entry of a user's follower list."""
+    user_id = serializers.IntegerField(source='follower_id', read_only=True)
+    username = serializers.CharField(source='follower.username', read_only=True)
+    followed_at = serializers.DateTimeField(source='created_at', read_only=True)
+
+    class Meta:
+        model = Follow
+        fields = ['user_id', 'username', 'followed_at']
+
+
+class FollowingSerializer(serializers.ModelSerializer):
+    """One entry of the list of accounts a user follows."""
+    user_id = serializers.IntegerField(source='followed_id', read_only=True)
+    username = serializers.CharField(source='followed.username', read_only=True)
+    followed_at = serializers.DateTimeField(source='created_at', read_only=True)
+
+    class Meta:
+        model = Follow
+        fields = ['user_id', 'username', 'followed_at']
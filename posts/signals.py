@@ -0,0 +1,208 @@
+from django.contrib.auth.models import User
+from django.db.models import QuerySet
+from django.db.models.signals import post_save, post_delete, pre_delete
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .models import Post, Comment, PostLike, CommentLike, Follow, UserProfile
+from .authentication import invalidate_token, invalidate_role
+from .feed_cache import bump_global_feed_generation, bump_user_feed_generation
+from .counters import (
+    adjust_post_like_count, adjust_post_comment_count, adjust_comment_like_count, adjust_follow_counts,
+    touch_post, rebuild_post_counters, rebuild_comment_counters,
+)
+from .timeline import backfill_timeline, fan_out_new_post, remove_from_timeline, timelines_enabled
+from .ranking import refresh_engagement_score, recompute_engagement_scores
+
+
+def _deleted_with(origin, *models):
+    """
+    True when a post_delete comes from deleting one of `models` (instance or
+    queryset), i.e. the row is a cascade. Per-row receivers skip those: the
+    rows belong to a post that is going away, and deleting a user fixes up
+    the posts it engaged with in one pass (see USER DELETION below).
+    """
+    model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return model in models
+
+
+# -----------------------------
+#   DENORMALIZED COUNTERS
+# -----------------------------
+@receiver(post_save, sender=PostLike)
+def increment_post_like_count(sender, instance, created, **kwargs):
+    if created:
+        adjust_post_like_count(instance.post_id, 1)
+
+
+@receiver(post_delete, sender=PostLike)
+def decrement_post_like_count(sender, instance, origin=None, **kwargs):
+    if not _deleted_with(origin, Post, User):
+        adjust_post_like_count(instance.post_id, -1)
+
+
+@receiver(post_save, sender=Comment)
+def increment_post_comment_count(sender, instance, created, **kwargs):
+    if created:
+        adjust_post_comment_count(instance.post_id, 1)
+    else:
+        # Edited comments are embedded in the post too (ETags, see posts/conditional.py)
+        touch_post(instance.post_id)
+
+
+@receiver(post_delete, sender=Comment)
+def decrement_post_comment_count(sender, instance, origin=None, **kwargs):
+    if not _deleted_with(origin, Post, User):
+        adjust_post_comment_count(instance.post_id, -1)
+
+
+@receiver(post_save, sender=CommentLike)
+def increment_comment_like_count(sender, instance, created, **kwargs):
+    if created:
+        adjust_comment_like_count(instance.comment_id, 1)
+
+
+@receiver(post_delete, sender=CommentLike)
+def decrement_comment_like_count(sender, instance, origin=None, **kwargs):
+    if not _deleted_with(origin, Post, User, Comment):
+        adjust_comment_like_count(instance.comment_id, -1)
+
+
+@receiver(post_save, sender=Follow)
+def increment_follow_counts(sender, instance, created, **kwargs):
+    if created:
+        adjust_follow_counts(instance.follower_id, instance.followed_id, 1)
+
+
+@receiver(post_delete, sender=Follow)
+def decrement_follow_counts(sender, instance, **kwargs):
+    adjust_follow_counts(instance.follower_id, instance.followed_id, -1)
+
+
+# -----------------------------
+#   ENGAGEMENT SCORES
+# -----------------------------
+# Registered after the counter receivers, so the score sees the new counts.
+# Inline like the counters: one single-row UPDATE, cheaper than queueing it.
+@receiver(post_save, sender=PostLike)
+@receiver(post_save, sender=Comment)
+def refresh_score_on_engagement(sender, instance, created, **kwargs):
+    if created:
+        refresh_engagement_score(instance.post_id)
+
+
+@receiver(post_delete, sender=PostLike)
+@receiver(post_delete, sender=Comment)
+def refresh_score_on_engagement_removed(sender, instance, origin=None, **kwargs):
+    if not _deleted_with(origin, Post, User):
+        refresh_engagement_score(instance.post_id)
+
+
+# -----------------------------
+#   FEED CACHE INVALIDATION
+# -----------------------------
+@receiver(post_save, sender=Post)
+def invalidate_feeds_on_post_save(sender, instance, created, **kwargs):
+    # A brand new private post is only visible to its author
+    if created and instance.privacy == 'private':
+        bump_user_feed_generation(instance.author_id)
+    else:
+        bump_global_feed_generation()
+
+
+@receiver(post_delete, sender=Post)
+def invalidate_feeds_on_post_delete(sender, instance, origin=None, **kwargs):
+    # Deleting a user bumps once for all of their posts
+    if not _deleted_with(origin, User):
+        bump_global_feed_generation()
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_feeds_on_comment_change(sender, instance, origin=None, **kwargs):
+    # Comments are embedded in every feed that shows the post
+    if not _deleted_with(origin, Post, User):
+        bump_global_feed_generation()
+
+
+@receiver(post_save, sender=PostLike)
+@receiver(post_delete, sender=PostLike)
+def invalidate_feeds_on_like_change(sender, instance, origin=None, **kwargs):
+    # Like lists and counts are embedded in every feed that shows the post
+    if not _deleted_with(origin, Post, User):
+        bump_global_feed_generation()
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_feeds_on_follow_change(sender, instance, **kwargs):
+    # Only the follower's 'followed' feed changes
+    bump_user_feed_generation(instance.follower_id)
+
+
+# -----------------------------
+#   USER DELETION
+# -----------------------------
+# A user's likes and comments on other people's posts cascade with the user;
+# remember those posts and comments first and recount them once afterwards.
+@receiver(pre_delete, sender=User)
+def remember_engaged_posts(sender, instance, **kwargs):
+    instance._engaged_post_ids = set(PostLike.objects.filter(user=instance).values_list('post_id', flat=True)) | \
+        set(Comment.objects.filter(author=instance).values_list('post_id', flat=True))
+    instance._liked_comment_ids = set(CommentLike.objects.filter(user=instance).values_list('comment_id', flat=True))
+
+
+@receiver(post_delete, sender=User)
+def recount_engaged_posts(sender, instance, **kwargs):
+    # Posts and comments deleted along with the user simply don't match
+    posts = Post.objects.filter(id__in=getattr(instance, '_engaged_post_ids', ()))
+    rebuild_post_counters(posts)
+    recompute_engagement_scores(posts)
+    rebuild_comment_counters(Comment.objects.filter(id__in=getattr(instance, '_liked_comment_ids', ())))
+    bump_global_feed_generation()
+
+
+# -----------------------------
+#   MATERIALIZED TIMELINES
+# -----------------------------
+@receiver(post_save, sender=Post)
+def fan_out_on_publish(sender, instance, created, **kwargs):
+    # New public posts, and private posts switched to public
+    became_public = instance.privacy == 'public' and (created or getattr(instance, '_loaded_privacy', None) != 'public')
+    instance._loaded_privacy = instance.privacy
+    if became_public and timelines_enabled():
+        fan_out_new_post.delay(instance.id)
+
+
+@receiver(post_save, sender=Follow)
+def backfill_timeline_on_follow(sender, instance, created, **kwargs):
+    if created and timelines_enabled():
+        backfill_timeline.delay(instance.follower_id, instance.followed_id)
+
+
+@receiver(post_delete, sender=Follow)
+def prune_timeline_on_unfollow(sender, instance, **kwargs):
+    remove_from_timeline(instance.follower_id, instance.followed_id)
+
+
+# -----------------------------
+#   AUTH / ROLE CACHE
+# -----------------------------
+@receiver(post_delete, sender=Token)
+def invalidate_cached_token(sender, instance, **kwargs):
+    invalidate_token(instance.key)
+
+
+@receiver(post_save, sender=User)
+def invalidate_cached_user_tokens(sender, instance, created, **kwargs):
+    # is_active / password changes must not be hidden behind a cached token
+    if not created:
+        for key in Token.objects.filter(user_id=instance.pk).values_list('key', flat=True):
+            invalidate_token(key)
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def invalidate_cached_role(sender, instance, **kwargs):
+    invalidate_role(instance.user_id)
+
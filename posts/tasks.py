@@ -0,0 +1,223 @@
+"""
+Background task queue for side effects that don't have to finish before
+the response (timeline fan-out and backfill, ...).
+
+    @task(max_attempts=3)
+    def fan_out_new_post(post_id): ...
+
+    fan_out_new_post.delay(post.id)   # or enqueue(fan_out_new_post, post.id)
+
+Arguments must be JSON-serializable (pass ids, not model instances); a
+decorated function can still be called directly. TASK_QUEUE_BACKEND picks
+where enqueued calls run:
+
+- 'immediate' (default): inline, as if called directly.
+- 'thread': a daemon worker thread in this process, after the current
+  transaction commits. Lost if the process dies; for tests and single-process
+  deployments.
+- 'db': a Task row, inserted in the current transaction so the task exists
+  exactly when the write that caused it does, executed by
+  `manage.py run_task_worker`.
+
+Failed tasks are retried with exponential backoff (TASK_RETRY_BACKOFF *
+2 ** (attempt - 1) seconds) up to the task's max_attempts; the 'db' backend
+then keeps them with status 'failed' and the last traceback.
+"""
+import importlib
+import queue
+import threading
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from singletons.logger_singleton import LoggerSingleton
+from .models import Task
+
+logger = LoggerSingleton().get_logger()
+
+_registry = {}
+
+
+def task(max_attempts=None):
+    """Register a function as a task and give it a `.delay()` shortcut."""
+    def decorator(func):
+        name = f'{func.__module__}.{func.__qualname__}'
+        func.task_name = name
+        func.max_attempts = max_attempts or getattr(settings, 'TASK_MAX_ATTEMPTS', 3)
+        func.delay = lambda *args, **kwargs: enqueue(func, *args, **kwargs)
+        _registry[name] = func
+        return func
+    return decorator
+
+
+def get_task(name):
+    """Resolve a task by name, importing its module if nothing registered it yet."""
+    if name not in _registry:
+        try:
+            importlib.import_module(name.rpartition('.')[0])
+        except ImportError:
+            pass
+        if name not in _registry:
+            raise LookupError(f"Unknown task: {name}")
+    return _registry[name]
+
+
+def retry_delay(attempt):
+    return getattr(settings, 'TASK_RETRY_BACKOFF', 2) * 2 ** (attempt - 1)
+
+
+def run_task(name, args, kwargs):
+    """Execute one task in the current thread."""
+    get_task(name)(*args, **kwargs)
+
+
+# -----------------------------
+#   BACKENDS
+# -----------------------------
+class ImmediateBackend:
+    def enqueue(self, name, args, kwargs):
+        run_task(name, args, kwargs)
+
+
+class ThreadBackend:
+    """Runs tasks in order on one daemon thread, once the enqueuing transaction commits."""
+
+    def __init__(self):
+        self.queue = queue.Queue()
+        self._worker = None
+        self._lock = threading.Lock()
+
+    def enqueue(self, name, args, kwargs):
+        self._ensure_worker()
+        transaction.on_commit(lambda: self.queue.put((name, args, kwargs, 1)))
+
+    def _ensure_worker(self):
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self.run, name='task-worker', daemon=True)
+                self._worker.start()
+
+    def run(self):
+        while True:
+            name, args, kwargs, attempt = self.queue.get()
+            try:
+                run_task(name, args, kwargs)
+            except Exception:
+                if attempt < get_task(name).max_attempts:
+                    logger.warning(f"Task {name} failed (attempt {attempt}), retrying", exc_info=True)
+                    retry = threading.Timer(retry_delay(attempt), self.queue.put,
+                                            args=((name, args, kwargs, attempt + 1),))
+                    retry.daemon = True
+                    retry.start()
+                else:
+                    logger.exception(f"Task {name} failed after {attempt} attempts")
+            finally:
+                close_old_connections()
+                self.queue.task_done()
+
+    def join(self):
+        """Block until every queued task has run (tests)."""
+        self.queue.join()
+
+
+class DatabaseBackend:
+    def enqueue(self, name, args, kwargs):
+        Task.objects.create(name=name, args=list(args), kwargs=kwargs, run_at=timezone.now())
+
+
+_backends = {}
+
+
+def get_task_backend():
+    backend = getattr(settings, 'TASK_QUEUE_BACKEND', None) or 'immediate'
+    if backend not in _backends:
+        if backend == 'immediate':
+            _backends[backend] = ImmediateBackend()
+        elif backend == 'thread':
+            _backends[backend] = ThreadBackend()
+        elif backend == 'db':
+            _backends[backend] = DatabaseBackend()
+        else:
+            raise ValueError(f"Unknown TASK_QUEUE_BACKEND: {backend}")
+    return _backends[backend]
+
+
+def enqueue(func, *args, **kwargs):
+    """Run `func(*args, **kwargs)` on the configured backend. `func` must be a @task."""
+    get_task_backend().enqueue(func.task_name, args, kwargs)
+
+
+# -----------------------------
+#   DATABASE WORKER
+# -----------------------------
+def claim_tasks(limit):
+    """
+    Claim up to `limit` due tasks for this worker. A claim is a conditional
+    UPDATE, so concurrent workers never run the same task; a claimed task
+    whose worker died becomes due again after TASK_VISIBILITY_TIMEOUT.
+    """
+    now = timezone.now()
+    lease = now + timedelta(seconds=getattr(settings, 'TASK_VISIBILITY_TIMEOUT', 300))
+    due = Task.objects.filter(status__in=(Task.QUEUED, Task.RUNNING), run_at__lte=now)
+    claimed = [
+        task_id for task_id in due.order_by('run_at', 'id').values_list('id', flat=True)[:limit]
+        # Re-checks due-ness: a task another worker just claimed has a future run_at
+        if due.filter(pk=task_id).update(status=Task.RUNNING, run_at=lease, attempts=F('attempts') + 1)
+    ]
+    return list(Task.objects.filter(pk__in=claimed).order_by('id'))
+
+
+def execute_claimed(task_row):
+    """Run a claimed Task row; delete it on success, reschedule or fail it otherwise."""
+    try:
+        run_task(task_row.name, task_row.args, task_row.kwargs)
+    except Exception:
+        error = traceback.format_exc()
+        try:
+            max_attempts = get_task(task_row.name).max_attempts
+        except LookupError:
+            max_attempts = 0
+        if task_row.attempts < max_attempts:
+            logger.warning(f"Task {task_row.name} #{task_row.id} failed (attempt {task_row.attempts}), retrying")
+            Task.objects.filter(pk=task_row.pk).update(
+                status=Task.QUEUED, last_error=error,
+                run_at=timezone.now() + timedelta(seconds=retry_delay(task_row.attempts)),
+            )
+        else:
+            logger.error(f"Task {task_row.name} #{task_row.id} failed after {task_row.attempts} attempts")
+            Task.objects.filter(pk=task_row.pk).update(status=Task.FAILED, last_error=error)
+        return False
+    Task.objects.filter(pk=task_row.pk).delete()
+    return True
+
+
+def run_due_tasks(limit=100):
+    """Claim and run one batch. Returns (succeeded, failed)."""
+    succeeded = failed = 0
+    for task_row in claim_tasks(limit):
+        if execute_claimed(task_row):
+            succeeded += 1
+        else:
+            failed += 1
+    return succeeded, failed
+
+
+def run_worker(poll_interval, batch_size=100, stop_event=None):
+    """Process the 'db' queue until `stop_event` is set, sleeping when it is empty."""
+    while stop_event is None or not stop_event.is_set():
+        try:
+            succeeded, failed = run_due_tasks(batch_size)
+        except Exception:
+            logger.exception("Task worker iteration failed")
+            succeeded = failed = 0
+        finally:
+            close_old_connections()
+        if not succeeded and not failed:
+            time.sleep(poll_interval)
@@ -0,0 +1,1276 @@
+import asyncio
+import base64
+import copy
+import gzip
+import json
+import os
+import re
+import runpy
+import tempfile
+import threading
+import time
+import unittest
+import uuid
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+from urllib.parse import parse_qs, urlparse
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.cache import cache, caches
+from django.db import connection, connections, OperationalError
+from django.db.utils import ConnectionHandler
+from django.http import HttpResponse
+from django.test import AsyncClient, RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed, NotFound
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIClient
+
+from connectly_project import settings as settings_module
+from factories.feed_factory import FeedFactory
+from singletons.logger_singleton import LoggerSingleton
+from .authentication import CachedTokenAuthentication, _local, get_user_role, token_cache_key
+from .benchmarks import measure
+from .cache_backends import TieredCache
+from .db_routing import ReadOnlyRequestMiddleware, ReadWriteRouter, _read_alias
+from .feed_cache import GLOBAL_GENERATION_KEY, get_feed_generation, get_or_rebuild, user_generation_key
+from .like_buffer import get_like_buffer, flush_like_buffer
+from .pagination import KeysetPagination
+from .ranking import decay_engagement_scores
+from .renderers import FastJSONRenderer
+from .models import Post, PostLike, Comment, CommentLike, Follow, Task, TimelineEntry, UserProfile
+from .tasks import task, run_due_tasks
+
+
+TEST_SETTINGS = dict(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}},
+    SECURE_SSL_REDIRECT=False,
+    AUTH_CACHE_LOCAL_TIMEOUT=0,
+)
+
+
+@override_settings(**TEST_SETTINGS)
+class FeedQueryCountTests(TestCase):
+    """The feed must cost the same number of queries however popular its posts are."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('author', password='pass')
+        cls.posts = [
+            Post.objects.create(title=f'Post {i}', content='content', author=cls.author)
+            for i in range(10)
+        ]
+
+    def add_engagement(self, likes_per_post, prefix='liker'):
+        likers = User.objects.bulk_create([
+            User(username=f'{prefix}{i}') for i in range(likes_per_post)
+        ])
+        for post in self.posts:
+            PostLike.objects.bulk_create([PostLike(user=u, post=post) for u in likers])
+            Comment.objects.bulk_create([
+                Comment(text='nice', author=u, post=post) for u in likers
+            ])
+
+    def feed_query_count(self):
+        client = APIClient()
+        with self.assertNumQueries(4) as ctx:  # count, posts, likes(+users), comments(+authors)
+            response = client.get('/api/feed/')
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def test_feed_query_count_is_constant(self):
+        self.add_engagement(1)
+        few = self.feed_query_count()
+        self.add_engagement(25, prefix='liker-b')
+        many = self.feed_query_count()
+        self.assertEqual(few, many)
+
+    def test_likes_are_serialized_as_usernames(self):
+        self.add_engagement(3)
+        response = APIClient().get('/api/feed/')
+        likes = response.json()['results'][0]['likes']
+        self.assertEqual(len(likes), 3)
+        self.assertTrue(all(name.startswith('liker') for name in likes))
+
+
+@override_settings(**TEST_SETTINGS)
+class KeysetPaginationTests(TestCase):
+    """Cursors page through ties on created_at without skipping or repeating rows."""
+
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user('author', password='pass')
+        Post.objects.bulk_create([Post(title=f'Post {i}', content='content', author=author) for i in range(7)])
+        # Same timestamp for every row, so only the id tie-breaker orders them
+        Post.objects.update(created_at=Post.objects.earliest('created_at').created_at)
+
+    def paginate(self, cursor=None):
+        params = {'page_size': 3}
+        if cursor:
+            params['cursor'] = cursor
+        paginator = KeysetPagination()
+        rows = paginator.paginate_queryset(
+            Post.objects.order_by('-created_at', '-id'), Request(RequestFactory().get('/', params))
+        )
+        return [row.id for row in rows], paginator
+
+    def cursor_of(self, link):
+        return parse_qs(urlparse(link).query)['cursor'][0] if link else None
+
+    def test_forward_and_back_across_equal_timestamps(self):
+        expected = list(Post.objects.order_by('-id').values_list('id', flat=True))
+
+        pages, cursor = [], None
+        while True:
+            ids, paginator = self.paginate(cursor)
+            pages.append(ids)
+            cursor = self.cursor_of(paginator.get_next_link())
+            if cursor is None:
+                break
+        self.assertEqual(pages, [expected[0:3], expected[3:6], expected[6:]])
+
+        back = []
+        cursor = self.cursor_of(paginator.get_previous_link())
+        while cursor:
+            ids, paginator = self.paginate(cursor)
+            back.insert(0, ids)
+            cursor = self.cursor_of(paginator.get_previous_link())
+        self.assertEqual(back, pages[:2])
+        self.assertIsNotNone(paginator.get_next_link())
+
+    def test_malformed_cursor_is_404(self):
+        bad_value = base64.urlsafe_b64encode(b'{"v":"yesterday","id":1}').decode()
+        for cursor in ('not-a-cursor', 'e30', bad_value):
+            with self.assertRaises(NotFound):
+                self.paginate(cursor)
+
+
+@override_settings(**dict(TEST_SETTINGS, FEED_EMBEDDED_COMMENTS=2))
+class EmbeddedCommentsTests(TestCase):
+    """Posts embed only their latest comments; the rest are paginated per post."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('author', password='pass')
+        cls.reader = User.objects.create_user('reader', password='pass')
+        cls.busy = Post.objects.create(title='Busy', content='content', author=cls.author)
+        cls.quiet = Post.objects.create(title='Quiet', content='content', author=cls.author)
+        cls.private = Post.objects.create(title='Private', content='content', author=cls.author, privacy='private')
+        cls.busy_comments = [Comment.objects.create(author=cls.reader, post=cls.busy, text=f'c{i}') for i in range(5)]
+        cls.quiet_comment = Comment.objects.create(author=cls.reader, post=cls.quiet, text='only')
+        Comment.objects.create(author=cls.author, post=cls.private, text='secret')
+
+    def test_feed_embeds_the_latest_comments(self):
+        results = {post['id']: post for post in APIClient().get('/api/feed/').json()['results']}
+        busy, quiet = results[self.busy.id], results[self.quiet.id]
+        self.assertEqual([c['id'] for c in busy['comments']], [c.id for c in reversed(self.busy_comments)][:2])
+        self.assertEqual(busy['comment_count'], 5)
+        self.assertEqual([c['id'] for c in quiet['comments']], [self.quiet_comment.id])
+
+    def test_post_comments_paginate(self):
+        client, url, ids = APIClient(), f'/api/posts/{self.busy.id}/comments/?page_size=2', []
+        while url:
+            data = client.get(url).json()
+            self.assertLessEqual(len(data['results']), 2)
+            ids += [c['id'] for c in data['results']]
+            url = data['next']
+        self.assertEqual(ids, [c.id for c in reversed(self.busy_comments)])
+
+    def test_private_post_comments(self):
+        url = f'/api/posts/{self.private.id}/comments/'
+        client = APIClient()
+        self.assertEqual(client.get(url).status_code, 403)
+        client.force_authenticate(self.reader)
+        self.assertEqual(client.get(url).status_code, 403)
+        client.force_authenticate(self.author)
+        self.assertEqual([c['text'] for c in client.get(url).json()['results']], ['secret'])
+
+
+@unittest.skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN output is SQLite specific')
+@override_settings(**TEST_SETTINGS)
+class FeedIndexUsageTests(TestCase):
+    """Every feed variant must be served from an index, not a full table scan."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('reader', password='pass')
+        cls.other = User.objects.create_user('writer', password='pass')
+        Follow.objects.create(follower=cls.user, followed=cls.other)
+
+    def plan(self, user, filter_param=None):
+        # Explain the page query the paginator actually runs
+        return FeedFactory(user).get_feed(filter_param)[:11].explain()
+
+    def assertNoFullScan(self, plan):
+        self.assertIsNone(re.search(r'\bSCAN posts_post\b', plan), plan)
+        self.assertRegex(plan, r'SEARCH (posts_post|posts_postlike) USING (COVERING )?INDEX')
+
+    def test_all_variants_use_an_index(self):
+        for filter_param in (None, 'liked', 'followed', 'private', 'public', 'top'):
+            with self.subTest(filter=filter_param):
+                self.assertNoFullScan(self.plan(self.user, filter_param))
+        self.assertNoFullScan(self.plan(AnonymousUser()))
+        self.assertNoFullScan(self.plan(AnonymousUser(), 'top'))
+
+    def test_single_range_variants_need_no_sort(self):
+        # (privacy, -created_at, -id) / (author, privacy, -created_at, -id) /
+        # (privacy, -engagement_score, -id) already deliver rows in feed order
+        for user, filter_param in ((self.user, 'public'), (self.user, 'private'), (AnonymousUser(), None),
+                                   (AnonymousUser(), 'top')):
+            with self.subTest(filter=filter_param):
+                self.assertNotIn('TEMP B-TREE FOR', self.plan(user, filter_param))
+
+
+
+@override_settings(**TEST_SETTINGS)
+class RankingTests(TestCase):
+    """The 'top' feed follows likes and comments, and old posts decay."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('author', password='pass')
+        cls.fans = [User.objects.create_user(f'fan{i}', password='pass') for i in range(2)]
+        cls.posts = [Post.objects.create(title=f'Post {i}', content='content', author=cls.author) for i in range(3)]
+
+    def top_ids(self):
+        return [post.id for post in FeedFactory(AnonymousUser()).get_feed('top')]
+
+    def test_engagement_orders_the_top_feed(self):
+        quiet, liked, discussed = self.posts
+        for fan in self.fans:
+            PostLike.objects.create(user=fan, post=liked)
+        # A comment weighs more than a like
+        PostLike.objects.create(user=self.fans[0], post=discussed)
+        Comment.objects.create(author=self.fans[1], post=discussed, text='hi')
+        self.assertEqual(self.top_ids(), [discussed.id, liked.id, quiet.id])
+
+        Comment.objects.create(author=self.fans[0], post=liked, text='hi')
+        self.assertEqual(self.top_ids(), [liked.id, discussed.id, quiet.id])
+
+    def test_decay_lowers_old_scores(self):
+        post = self.posts[0]
+        PostLike.objects.create(user=self.fans[0], post=post)
+        post.refresh_from_db()
+        fresh = post.engagement_score
+        self.assertGreater(fresh, 0)
+
+        decay_engagement_scores(now=timezone.now() + timedelta(hours=12))
+        post.refresh_from_db()
+        self.assertLess(post.engagement_score, fresh)
+        self.assertGreater(post.engagement_score, 0)
+
+        decay_engagement_scores(now=timezone.now() + timedelta(days=8))
+        post.refresh_from_db()
+        self.assertEqual(post.engagement_score, 0)
+
+
+@override_settings(**TEST_SETTINGS)
+class ListEndpointTests(TestCase):
+    """List endpoints page newest first by keyset cursor and export NDJSON."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [User.objects.create_user(f'user{i}', password='pass') for i in range(5)]
+        post = Post.objects.create(title='Post', content='content', author=cls.users[0])
+        for user in cls.users:
+            comment = Comment.objects.create(author=user, post=post, text='hi')
+            CommentLike.objects.create(user=user, comment=comment)
+            if user != cls.users[0]:
+                PostLike.objects.create(user=user, post=post)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.users[0])
+
+    def walk(self, url, key):
+        seen = []
+        while url:
+            data = self.client.get(url).json()
+            self.assertLessEqual(len(data['results']), 2)
+            seen += [row[key] for row in data['results']]
+            url = data['next']
+        return seen
+
+    def test_lists_page_newest_first(self):
+        cases = (
+            ('/api/users/', 'username', [u.username for u in reversed(self.users)]),
+            ('/api/comments/', 'id', list(Comment.objects.order_by('-id').values_list('id', flat=True))),
+            ('/api/post-likes/', 'id', list(PostLike.objects.order_by('-id').values_list('id', flat=True))),
+            ('/api/comment-likes/', 'id', list(CommentLike.objects.order_by('-id').values_list('id', flat=True))),
+        )
+        for url, key, expected in cases:
+            with self.subTest(url=url):
+                self.assertEqual(self.walk(f'{url}?page_size=2', key), expected)
+
+    @unittest.skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN output is SQLite specific')
+    def test_pages_seek_an_index(self):
+        for queryset, index in ((Comment.objects.order_by('-created_at', '-id'), 'comment_created_idx'),
+                                (PostLike.objects.order_by('-created_at', '-id'), 'postlike_created_idx'),
+                                (CommentLike.objects.order_by('-created_at', '-id'), 'commentlike_created_idx'),
+                                (User.objects.order_by('-id'), 'INTEGER PRIMARY KEY')):
+            with self.subTest(model=queryset.model.__name__):
+                paginator = KeysetPagination()
+                paginator.paginate_queryset(queryset, Request(RequestFactory().get('/', {'page_size': 2})))
+                cursor = parse_qs(urlparse(paginator.get_next_link()).query)['cursor'][0]
+                page = paginator.get_page_queryset(queryset, Request(RequestFactory().get('/', {'cursor': cursor})))
+                plan = page.explain()
+                self.assertRegex(plan, rf'SEARCH \w+ USING (INDEX )?{index}')
+                self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_ndjson_export_streams_every_row(self):
+        response = self.client.get('/api/comments/?export=ndjson')
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual([row['id'] for row in rows], list(Comment.objects.order_by('-id').values_list('id', flat=True)))
+
+
+@override_settings(**dict(TEST_SETTINGS, REQUEST_METRICS_SAMPLE_RATE=1.0))
+class RequestMetricsTests(TestCase):
+    """Sampled requests report their queries and timings in a header and a log line."""
+
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user('author', password='pass')
+        Post.objects.create(title='Post', content='content', author=author)
+
+    def metrics_logs(self, logs):
+        return [record.request_metrics for record in logs.records if hasattr(record, 'request_metrics')]
+
+    def test_sampled_request_is_reported(self):
+        with self.assertLogs('connectly_logger', 'INFO') as logs, CaptureQueriesContext(connection) as queries:
+            response = APIClient().get('/api/feed/')
+        timing = response['Server-Timing']
+        self.assertRegex(timing, r'^total;dur=[\d.]+, db;dur=[\d.]+;desc="\d+ queries"')
+        self.assertIn(f'desc="{len(queries)} queries"', timing)
+        self.assertRegex(timing, r'query;dur=[\d.]+, serialize;dur=[\d.]+')
+
+        [fields] = self.metrics_logs(logs)
+        self.assertEqual(
+            (fields['method'], fields['path'], fields['status'], fields['queries']),
+            ('GET', '/api/feed/', 200, len(queries)),
+        )
+        self.assertIn('serialize_ms', fields)
+
+    @override_settings(REQUEST_METRICS_SAMPLE_RATE=0.0)
+    def test_unsampled_request_is_not(self):
+        with self.assertLogs('connectly_logger', 'INFO') as logs:
+            response = APIClient().get('/api/feed/')
+            # assertLogs needs one record
+            LoggerSingleton().get_logger().info('done')
+        self.assertNotIn('Server-Timing', response)
+        self.assertEqual(self.metrics_logs(logs), [])
+
+    def test_sample_rate(self):
+        with override_settings(REQUEST_METRICS_SAMPLE_RATE=0.25), mock.patch('random.random', side_effect=[0.1, 0.3]):
+            sampled = [('Server-Timing' in APIClient().get('/api/feed/')) for _ in range(2)]
+        self.assertEqual(sampled, [True, False])
+
+
+class RendererTests(SimpleTestCase):
+    """FastJSONRenderer writes the same bytes as DRF's JSONRenderer."""
+
+    def test_matches_drf(self):
+        data = {
+            'text': 'line\u2028para\u2029 caf\u00e9 \U0001f600 "quoted" </script>',
+            'created_at': timezone.now(),
+            'day': timezone.now().date(),
+            'amount': Decimal('1.50'),
+            'uuid': uuid.uuid4(),
+            'nested': [{'count': 1, 'ratio': 1.5, 'none': None, 'flag': True}],
+            1: 'integer key',
+        }
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertIn(b'\\u2028', FastJSONRenderer().render(data))
+
+    def test_non_finite_floats_render_as_null(self):
+        # The documented difference: DRF's strict mode raises instead
+        self.assertEqual(FastJSONRenderer().render({'score': float('nan')}), b'{"score":null}')
+        with self.assertRaises(ValueError):
+            JSONRenderer().render({'score': float('nan')})
+
+
+@override_settings(**TEST_SETTINGS)
+class CompactFeedTests(TestCase):
+    """?compact=1 references users by id and side-loads their usernames once."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('author', password='pass')
+        cls.fan = User.objects.create_user('fan', password='pass')
+        post = Post.objects.create(title='Post', content='content', author=cls.author)
+        PostLike.objects.create(user=cls.fan, post=post)
+        Comment.objects.create(author=cls.fan, post=post, text='hi')
+
+    def test_compact_page(self):
+        full = APIClient().get('/api/feed/').json()
+        compact = APIClient().get('/api/feed/?compact=1').json()
+        [post], [compact_post] = full['results'], compact['results']
+        self.assertEqual(compact['users'], {str(self.author.id): 'author', str(self.fan.id): 'fan'})
+        self.assertEqual(
+            (compact_post['author'], compact_post['likes'], compact_post['comments'][0]['author']),
+            (self.author.id, [self.fan.id], self.fan.id),
+        )
+        users = compact['users']
+        self.assertEqual(
+            (users[str(compact_post['author'])], [users[str(uid)] for uid in compact_post['likes']]),
+            (post['author'], post['likes']),
+        )
+
+
+@unittest.skipUnless(connection.vendor == 'sqlite', 'The FTS5 search index is SQLite specific')
+@override_settings(**TEST_SETTINGS)
+class SearchTests(TestCase):
+    """Search must come from the FTS index and respect post privacy."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('author', password='pass')
+        cls.public = Post.objects.create(title='Coffee notes', content='espresso espresso', author=cls.author)
+        cls.other = Post.objects.create(title='Tea', content='one espresso', author=cls.author)
+        cls.private = Post.objects.create(title='Diary', content='espresso', author=cls.author, privacy='private')
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_ranked_and_privacy_filtered(self):
+        response = self.client.get('/api/search/', {'q': 'espresso'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([p['id'] for p in response.data['results']], [self.public.id, self.other.id])
+
+        self.client.force_authenticate(self.author)
+        response = self.client.get('/api/search/', {'q': 'espresso'})
+        self.assertIn(self.private.id, [p['id'] for p in response.data['results']])
+
+    def test_index_follows_edits(self):
+        self.public.content = 'latte'
+        self.public.save()
+        response = self.client.get('/api/search/', {'q': 'espresso'})
+        self.assertEqual([p['id'] for p in response.data['results']], [self.other.id])
+
+
+@override_settings(**dict(TEST_SETTINGS, CACHES={'default': {
+    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'feed-generation-tests',
+}}))
+class FeedGenerationTests(TestCase):
+    """Every write path bumps the generation of exactly the feeds it changes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('author', password='pass')
+        cls.reader = User.objects.create_user('reader', password='pass')
+
+    def setUp(self):
+        cache.clear()
+
+    def generations(self):
+        get_feed_generation(self.author.id), get_feed_generation(self.reader.id)
+        return {
+            'global': cache.get(GLOBAL_GENERATION_KEY),
+            'author': cache.get(user_generation_key(self.author.id)),
+            'reader': cache.get(user_generation_key(self.reader.id)),
+        }
+
+    @contextmanager
+    def assertBumps(self, *names):
+        before = self.generations()
+        yield
+        after = self.generations()
+        self.assertEqual({name for name in before if before[name] != after[name]}, set(names))
+
+    def test_write_paths(self):
+        with self.assertBumps('global'):
+            post = Post.objects.create(title='Public', content='content', author=self.author)
+        with self.assertBumps('author'):
+            Post.objects.create(title='Private', content='content', author=self.author, privacy='private')
+        with self.assertBumps('global'):
+            post.title = 'Edited'
+            post.save()
+        with self.assertBumps('global'):
+            like = PostLike.objects.create(user=self.reader, post=post)
+        with self.assertBumps('global'):
+            like.delete()
+        with self.assertBumps('global'):
+            comment = Comment.objects.create(author=self.reader, post=post, text='hi')
+        with self.assertBumps('global'):
+            comment.delete()
+        with self.assertBumps('reader'):
+            follow = Follow.objects.create(follower=self.reader, followed=self.author)
+        with self.assertBumps('reader'):
+            follow.delete()
+        with self.assertBumps('global'):
+            post.delete()
+
+
+@override_settings(**dict(TEST_SETTINGS, CACHES={'default': {
+    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'conditional-get-tests',
+}}))
+class ConditionalGetTests(TestCase):
+    """Revalidating an unchanged post or feed page returns 304 cheaply."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('author', password='pass')
+        cls.liker = User.objects.create_user('liker', password='pass')
+        cls.post = Post.objects.create(title='Post', content='content', author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def test_post_detail(self):
+        url = f'/api/posts/{self.post.id}/'
+        etag = self.client.get(url)['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        # Likes only touch counters, not save(); the tag must still change
+        PostLike.objects.create(user=self.liker, post=self.post)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_unchanged_feed_costs_no_queries(self):
+        etag = self.client.get('/api/feed/')['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/feed/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        Comment.objects.create(post=self.post, author=self.liker, text='new')
+        self.assertEqual(self.client.get('/api/feed/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+@override_settings(**dict(TEST_SETTINGS, CACHES={'default': {
+    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'compressed-feed-tests',
+}}))
+class CompressedFeedCacheTests(TestCase):
+    """Cached feed pages are served as stored, precompressed bytes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('author', password='pass')
+        for i in range(10):
+            Post.objects.create(title=f'Post {i}', content='content ' * 20, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def test_cache_hit_serves_gzip_bytes(self):
+        first = self.client.get('/api/feed/', HTTP_ACCEPT_ENCODING='gzip')
+        with self.assertNumQueries(0):
+            second = self.client.get('/api/feed/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(second['Content-Encoding'], 'gzip')
+        # One tag for every coding of the page, so it must be weak
+        self.assertTrue(second['ETag'].startswith('W/"'))
+        self.assertIn('Accept-Encoding', second['Vary'])
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(len(json.loads(gzip.decompress(second.content))['results']), 10)
+
+        plain = self.client.get('/api/feed/')
+        self.assertFalse(plain.has_header('Content-Encoding'))
+        self.assertEqual(json.loads(plain.content), json.loads(gzip.decompress(second.content)))
+
+
+@override_settings(CACHES={
+    'default': {'BACKEND': 'posts.cache_backends.TieredCache', 'OPTIONS': {'L2': 'shared', 'L1_TIMEOUT': 60}},
+    'shared': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tiered-tests'},
+    # Nothing listens on port 1: every call fails like an unreachable Redis
+    'down': {'BACKEND': 'django_redis.cache.RedisCache', 'LOCATION': 'redis://127.0.0.1:1/0'},
+})
+class TieredCacheTests(TestCase):
+    """In-process L1 over a shared L2, with coalescing and a local fallback."""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_l1_serves_hits_and_writes_invalidate_it(self):
+        cache.set('key', 'value')
+        caches['shared'].set('key', 'changed elsewhere')
+        self.assertEqual(cache.get('key'), 'value')
+
+        cache.delete('key')
+        self.assertIsNone(caches['shared'].get('key'))
+        self.assertIsNone(cache.get('key'))
+
+    def test_concurrent_misses_compute_once(self):
+        calls = []
+        started = threading.Event()
+
+        def compute():
+            calls.append(True)
+            started.set()
+            time.sleep(0.2)
+            return 'page'
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.get_or_set('page', compute)))
+                   for _ in range(5)]
+        threads[0].start()
+        started.wait()
+        for thread in threads[1:]:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(calls, [True])
+        self.assertEqual(results, ['page'] * 5)
+
+    def test_falls_back_to_local_memory_when_l2_is_down(self):
+        tiered = TieredCache('down-tests', {'OPTIONS': {'L2': 'down', 'L1_TIMEOUT': 0}})
+        tiered.set('key', 'value')
+        self.assertEqual(tiered.get('key'), 'value')
+        self.assertTrue(tiered.add('counter', 1))
+        self.assertEqual(tiered.incr('counter'), 2)
+
+    def test_short_timeouts_are_not_kept_in_l1(self):
+        cache.set('key', 'value', timeout=0)
+        self.assertIsNone(cache.get('key'))
+
+    def test_writes_missed_during_an_outage_are_dropped_on_recovery(self):
+        up = {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'recovery-tests'}
+        down = {'BACKEND': 'django_redis.cache.RedisCache', 'LOCATION': 'redis://127.0.0.1:1/0'}
+        tiered = TieredCache('recovery-tests', {'OPTIONS': {'L2': 'flaky', 'L1_TIMEOUT': 0, 'RETRY_AFTER': 0}})
+        with self.settings(CACHES=dict(settings.CACHES, flaky=up)):
+            tiered.set(GLOBAL_GENERATION_KEY, 5, timeout=None)
+            tiered.set('auth:token:revoked', 'user')
+        with self.settings(CACHES=dict(settings.CACHES, flaky=down)):
+            tiered.set(GLOBAL_GENERATION_KEY, 6, timeout=None)
+            tiered.delete('auth:token:revoked')
+        with self.settings(CACHES=dict(settings.CACHES, flaky=up)):
+            self.assertIsNone(tiered.get(GLOBAL_GENERATION_KEY))
+            self.assertIsNone(tiered.get('auth:token:revoked'))
+
+
+@override_settings(CACHES={'default': {
+    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'feed-stampede-tests',
+}})
+class FeedStampedeTests(TestCase):
+    """A missing or outdated feed page is rebuilt by one request at a time."""
+
+    def setUp(self):
+        cache.clear()
+        self.builds = []
+
+    def build(self, value='page'):
+        def build():
+            self.builds.append(value)
+            time.sleep(0.2)
+            return value
+        return build
+
+    def test_concurrent_misses_rebuild_once(self):
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(get_or_rebuild('feed', 'g1', self.build())))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.builds, ['page'])
+        self.assertEqual(sorted(rebuilt for _, _, rebuilt in results), [False] * 7 + [True])
+        self.assertTrue(all(value == 'page' for value, _, _ in results))
+
+    def test_outdated_page_is_served_while_another_request_rebuilds(self):
+        get_or_rebuild('feed', 'g1', self.build('old'))
+        cache.add('feed:rebuild', 1)
+        self.assertEqual(get_or_rebuild('feed', 'g2', self.build('new')), ('old', 'g1', False))
+
+        cache.delete('feed:rebuild')
+        self.assertEqual(get_or_rebuild('feed', 'g2', self.build('new')), ('new', 'g2', True))
+        self.assertEqual(self.builds, ['old', 'new'])
+
+
+RECORDED = []
+
+
+@override_settings(**dict(TEST_SETTINGS, AUTH_CACHE_LOCAL_TIMEOUT=30, CACHES={'default': {
+    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'auth-cache-tests',
+}}))
+class AuthCacheTests(TestCase):
+    """Cached token lookups cost no query, hand out fresh users and follow revocations."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('member', password='pass')
+        cls.token = Token.objects.create(user=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        _local.clear()
+        self.key = self.token.key
+
+    def authenticate(self):
+        return CachedTokenAuthentication().authenticate_credentials(self.key)
+
+    def test_hits_return_fresh_users_without_the_password(self):
+        first, _ = self.authenticate()
+        with self.assertNumQueries(0):
+            second, token = self.authenticate()
+        self.assertEqual((second.pk, token.key, token.user), (self.user.pk, self.token.key, second))
+        self.assertIsNot(first, second)
+        first.leaked = True
+        self.assertFalse(hasattr(self.authenticate()[0], 'leaked'))
+
+        self.assertNotIn(self.user.password, str(cache.get(token_cache_key(self.token.key))))
+        # Loaded on demand
+        with self.assertNumQueries(1):
+            self.assertTrue(second.check_password('pass'))
+
+    def test_deleting_the_token_revokes_it(self):
+        self.authenticate()
+        self.token.delete()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    def test_saving_the_user_drops_cached_tokens(self):
+        self.authenticate()
+        self.user.is_active = False
+        self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    def test_profile_changes_drop_the_cached_role(self):
+        profile = UserProfile.objects.create(user=self.user)
+        self.assertEqual(get_user_role(self.user), 'user')
+        with self.assertNumQueries(0):
+            get_user_role(self.user)
+        profile.role = 'admin'
+        profile.save()
+        self.assertEqual(get_user_role(self.user), 'admin')
+
+
+@override_settings(**dict(TEST_SETTINGS, CACHES={'default': {
+    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'feed-view-stampede-tests',
+}}))
+class FeedViewStampedeTests(TransactionTestCase):
+    """Concurrent misses on one feed page run the feed query once."""
+
+    def setUp(self):
+        cache.clear()
+        author = User.objects.create_user('author', password='pass')
+        Post.objects.create(title='Post', content='content', author=author)
+
+    def test_concurrent_misses_build_once(self):
+        get_feed = FeedFactory.get_feed
+        calls = []
+        started = threading.Event()
+
+        def slow_get_feed(factory, *args, **kwargs):
+            calls.append(True)
+            started.set()
+            time.sleep(0.3)
+            return get_feed(factory, *args, **kwargs)
+
+        responses = []
+
+        def fetch():
+            try:
+                responses.append(APIClient().get('/api/feed/'))
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=fetch) for _ in range(5)]
+        with mock.patch.object(FeedFactory, 'get_feed', slow_get_feed):
+            threads[0].start()
+            started.wait()
+            for thread in threads[1:]:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(calls, [True])
+        self.assertEqual([r.status_code for r in responses], [200] * 5)
+        self.assertEqual(len({r.content for r in responses}), 1)
+
+
+@task(max_attempts=2)
+def record_call(value, fail=False):
+    RECORDED.append(value)
+    if fail:
+        raise RuntimeError('boom')
+
+
+@override_settings(**dict(TEST_SETTINGS, TASK_QUEUE_BACKEND='db', TASK_RETRY_BACKOFF=0))
+class TaskQueueTests(TestCase):
+    """The 'db' queue runs tasks in a worker and retries failures."""
+
+    def setUp(self):
+        RECORDED.clear()
+
+    def test_tasks_run_in_the_worker(self):
+        record_call.delay('a')
+        self.assertEqual(RECORDED, [])
+        self.assertEqual(Task.objects.count(), 1)
+
+        self.assertEqual(run_due_tasks(), (1, 0))
+        self.assertEqual(RECORDED, ['a'])
+        self.assertFalse(Task.objects.exists())
+
+    def test_failures_are_retried_then_kept(self):
+        record_call.delay('b', fail=True)
+        self.assertEqual(run_due_tasks(), (0, 1))
+        self.assertEqual(Task.objects.get().status, Task.QUEUED)
+
+        self.assertEqual(run_due_tasks(), (0, 1))
+        failed = Task.objects.get()
+        self.assertEqual((failed.status, failed.attempts), (Task.FAILED, 2))
+        self.assertIn('boom', failed.last_error)
+        self.assertEqual(run_due_tasks(), (0, 0))
+        self.assertEqual(RECORDED, ['b', 'b'])
+
+
+@override_settings(**TEST_SETTINGS)
+class CascadeDeleteTests(TestCase):
+    """Rows deleted with their post or user don't run per-row counter updates."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('author', password='pass')
+        cls.fan = User.objects.create_user('fan', password='pass')
+        cls.post = Post.objects.create(title='Popular', content='content', author=cls.author)
+        cls.other = Post.objects.create(title='Other', content='content', author=cls.author)
+        likers = User.objects.bulk_create([User(username=f'liker{i}') for i in range(100)])
+        PostLike.objects.bulk_create([PostLike(user=u, post=cls.post) for u in likers])
+        Comment.objects.bulk_create([Comment(author=u, post=cls.post, text='hi') for u in likers])
+
+    def test_post_delete_skips_per_row_updates(self):
+        with self.assertNumQueries(7):
+            self.post.delete()
+        self.assertFalse(PostLike.objects.exists())
+
+    def test_user_delete_recounts_other_posts(self):
+        PostLike.objects.create(user=self.fan, post=self.other)
+        comment = Comment.objects.create(author=self.author, post=self.other, text='mine')
+        CommentLike.objects.create(user=self.fan, comment=comment)
+        Comment.objects.create(author=self.fan, post=self.other, text='hi')
+
+        self.fan.delete()
+        self.other.refresh_from_db()
+        comment.refresh_from_db()
+        self.assertEqual((self.other.like_count, self.other.comment_count), (0, 1))
+        self.assertEqual(comment.like_count, 0)
+
+
+@override_settings(**TEST_SETTINGS)
+class BulkEndpointTests(TestCase):
+    """Bulk endpoints report a status per id and recount what they touched."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('author', password='pass')
+        cls.fan = User.objects.create_user('fan', password='pass')
+        cls.other = User.objects.create_user('other', password='pass')
+        cls.posts = [Post.objects.create(title=f'Post {i}', content='content', author=cls.author) for i in range(3)]
+        cls.own = Post.objects.create(title='Own', content='content', author=cls.fan)
+        cls.comment = Comment.objects.create(author=cls.author, post=cls.posts[0], text='hi')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.fan)
+
+    def test_rejects_non_integer_ids(self):
+        for ids in ([1.5], [True], ['1'], [None]):
+            response = self.client.post('/api/post-likes/bulk/', {'posts': ids}, format='json')
+            self.assertEqual(response.status_code, 400, ids)
+        self.assertFalse(PostLike.objects.exists())
+
+    def test_post_like_statuses_and_counters(self):
+        first, second, third = self.posts
+        PostLike.objects.create(user=self.fan, post=first)
+        response = self.client.post('/api/post-likes/bulk/', {
+            'posts': [first.id, second.id, second.id, self.own.id, 0, third.id]
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['created'], 2)
+        self.assertEqual([r['status'] for r in response.json()['results']],
+                         ['already_liked', 'created', 'rejected', 'not_found', 'created'])
+        self.assertEqual([p.like_count for p in Post.objects.filter(author=self.author).order_by('id')], [1, 1, 1])
+
+    def test_post_like_counter_ignores_likes_lost_to_a_race(self):
+        post = self.posts[0]
+        raced = []
+
+        def like_first(execute, sql, params, many, context):
+            # Another request likes the post between the existence check and the insert
+            if not raced and sql.startswith('INSERT') and '"posts_postlike"' in sql:
+                raced.append(True)
+                PostLike.objects.create(user=self.fan, post=post)
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(like_first):
+            response = self.client.post('/api/post-likes/bulk/', {'posts': [post.id]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        post.refresh_from_db()
+        self.assertEqual((post.like_count, PostLike.objects.count()), (1, 1))
+
+    def test_comment_like_counters(self):
+        CommentLike.objects.create(user=self.other, comment=self.comment)
+        response = self.client.post('/api/comment-likes/bulk/', {'comments': [self.comment.id, 0]}, format='json')
+        self.assertEqual([r['status'] for r in response.json()['results']], ['created', 'not_found'])
+        self.comment.refresh_from_db()
+        self.assertEqual(self.comment.like_count, 2)
+
+    def test_follow_statuses_and_counters(self):
+        Follow.objects.create(follower=self.other, followed=self.author)
+        response = self.client.post('/api/follow/bulk/', {
+            'users': [self.author.id, self.other.id, self.fan.id, 0]
+        }, format='json')
+        self.assertEqual([r['status'] for r in response.json()['results']],
+                         ['created', 'created', 'rejected', 'not_found'])
+        response = self.client.post('/api/follow/bulk/', {'users': [self.author.id]}, format='json')
+        self.assertEqual(response.json()['results'][0]['status'], 'already_following')
+
+        counts = dict(UserProfile.objects.values_list('user__username', 'follower_count'))
+        self.assertEqual((counts['author'], counts['other'], counts['fan']), (2, 1, 0))
+        self.assertEqual(UserProfile.objects.get(user=self.fan).following_count, 2)
+
+
+@override_settings(**TEST_SETTINGS)
+class FollowTests(TestCase):
+    """Follow/unfollow keep the profile counters right; follow lists paginate."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.me = User.objects.create_user('me', password='pass')
+        cls.others = [User.objects.create_user(f'other{i}', password='pass') for i in range(4)]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.me)
+
+    def counts(self, user):
+        profile = UserProfile.objects.get(user=user)
+        return profile.follower_count, profile.following_count
+
+    def test_follow_and_unfollow_update_counters(self):
+        first, second = self.others[:2]
+        self.assertEqual(self.client.post(f'/api/follow/{first.id}/').status_code, 201)
+        self.assertEqual(self.client.post(f'/api/follow/{second.id}/').status_code, 201)
+        self.assertEqual(self.client.post(f'/api/follow/{second.id}/').status_code, 400)
+        self.assertEqual((self.counts(self.me), self.counts(first), self.counts(second)), ((0, 2), (1, 0), (1, 0)))
+
+        self.assertEqual(self.client.post(f'/api/unfollow/{first.id}/').status_code, 200)
+        self.assertEqual(self.client.post(f'/api/unfollow/{first.id}/').status_code, 400)
+        self.assertEqual((self.counts(self.me), self.counts(first), self.counts(second)), ((0, 1), (0, 0), (1, 0)))
+
+    def walk(self, url):
+        names = []
+        while url:
+            data = self.client.get(url).json()
+            self.assertLessEqual(len(data['results']), 3)
+            names += [row['username'] for row in data['results']]
+            url = data['next']
+        return names
+
+    def test_follow_lists_paginate(self):
+        for other in self.others:
+            Follow.objects.create(follower=other, followed=self.me)
+            Follow.objects.create(follower=self.me, followed=other)
+        newest_first = [other.username for other in reversed(self.others)]
+        self.assertEqual(self.walk(f'/api/users/{self.me.id}/followers/?page_size=3'), newest_first)
+        self.assertEqual(self.walk(f'/api/users/{self.me.id}/following/?page_size=3'), newest_first)
+        self.assertEqual(self.counts(self.me), (4, 4))
+
+
+def fail_postlike_inserts(execute, sql, params, many, context):
+    if sql.startswith('INSERT') and '"posts_postlike"' in sql:
+        raise OperationalError('database is locked')
+    return execute(sql, params, many, context)
+
+
+@override_settings(**dict(TEST_SETTINGS, LIKE_BUFFER_BACKEND='memory', LIKE_BUFFER_FLUSH_INTERVAL=3600))
+class LikeBufferTests(TestCase):
+    """Buffered likes are visible before the flush and survive a failed one."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('author', password='pass')
+        cls.fan = User.objects.create_user('fan', password='pass')
+        cls.post = Post.objects.create(title='Post', content='content', author=cls.author)
+
+    def setUp(self):
+        get_like_buffer().drain()
+        self.client = APIClient()
+        self.client.force_authenticate(self.fan)
+
+    def like(self):
+        return self.client.post('/api/post-likes/', {'post': self.post.id}, format='json')
+
+    def assertLikedBy(self, username):
+        data = self.client.get(f'/api/posts/{self.post.id}/').json()
+        self.assertEqual((data['like_count'], data['likes']), (1, [username]))
+
+    def test_pending_like_is_read_then_flushed(self):
+        self.assertEqual(self.like().status_code, 202)
+        self.assertEqual(self.like().status_code, 400)
+        self.assertFalse(PostLike.objects.exists())
+        self.assertLikedBy('fan')
+
+        self.assertEqual(flush_like_buffer(), 1)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.like_count, 1)
+        self.assertEqual(get_like_buffer().pending([self.post.id]), {})
+        self.assertLikedBy('fan')
+
+    def test_failed_flush_keeps_the_likes(self):
+        self.like()
+        with connection.execute_wrapper(fail_postlike_inserts), self.assertRaises(OperationalError):
+            flush_like_buffer()
+        self.assertFalse(PostLike.objects.exists())
+        self.assertEqual(get_like_buffer().pending([self.post.id]), {self.post.id: [(self.fan.id, 'fan')]})
+
+        self.assertEqual(flush_like_buffer(), 1)
+        self.assertTrue(PostLike.objects.filter(user=self.fan, post=self.post).exists())
+
+
+@override_settings(**dict(TEST_SETTINGS, FEED_TIMELINE_BACKEND='db', FEED_TIMELINE_MAX_LENGTH=5))
+class TimelineTests(TestCase):
+    """The materialized 'followed' feed matches the read-time one and stays bounded."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('author', password='pass')
+        cls.reader = User.objects.create_user('reader', password='pass')
+        Follow.objects.create(follower=cls.reader, followed=cls.author)
+
+    def followed_ids(self):
+        return [post.id for post in FeedFactory(self.reader).get_feed('followed')]
+
+    def test_post_made_public_is_fanned_out(self):
+        public = Post.objects.create(title='Public', content='content', author=self.author)
+        private = Post.objects.create(title='Private', content='content', author=self.author, privacy='private')
+        self.assertEqual(self.followed_ids(), [public.id])
+
+        client = APIClient()
+        client.force_authenticate(self.author)
+        response = client.put(f'/api/posts/{private.id}/', {'privacy': 'public'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.followed_ids(), [private.id, public.id])
+
+    def test_timelines_are_trimmed(self):
+        posts = [Post.objects.create(title=f'Post {i}', content='content', author=self.author) for i in range(8)]
+        self.assertEqual(TimelineEntry.objects.filter(user=self.reader).count(), 5)
+        self.assertEqual(self.followed_ids(), [post.id for post in reversed(posts)][:5])
+
+    @unittest.skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN output is SQLite specific')
+    def test_timeline_is_a_range_read(self):
+        with self.assertNumQueries(0):
+            feed = FeedFactory(self.reader).get_feed('followed')
+        plan = feed[:11].explain()
+        self.assertIn('timeline_user_created_idx', plan)
+        self.assertIsNone(re.search(r'\bSCAN posts_post\b', plan), plan)
+
+
+@override_settings(**dict(TEST_SETTINGS, CACHES={'default': {
+    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'async-view-tests',
+}}))
+class AsyncViewTests(TestCase):
+    """The async endpoints answer like their sync counterparts."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('author', password='pass')
+        cls.reader = User.objects.create_user('reader', password='pass')
+        cls.token = Token.objects.create(user=cls.reader)
+        Follow.objects.create(follower=cls.reader, followed=cls.author)
+        cls.post = Post.objects.create(title='Post', content='content', author=cls.author)
+        cls.private = Post.objects.create(title='Private', content='content', author=cls.author, privacy='private')
+        PostLike.objects.create(user=cls.reader, post=cls.post)
+        Comment.objects.create(author=cls.reader, post=cls.post, text='hi')
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.reader)
+
+    async def aget(self, path, **params):
+        return await AsyncClient().get(path, params, headers={'Authorization': f'Token {self.token.key}'})
+
+    async def test_feed_matches_the_sync_feed(self):
+        for params in ({}, {'compact': '1'}, {'filter': 'followed', 'pagination': 'cursor'}):
+            with self.subTest(**params):
+                expected = (await sync_to_async(self.client.get)('/api/feed/', params)).json()
+                data = json.loads((await self.aget('/api/async/feed/', **params)).content)
+                expected.pop('next'), data.pop('next')
+                self.assertEqual(data, expected)
+
+    async def test_feed_revalidation(self):
+        response = await self.aget('/api/async/feed/')
+        etag = response['ETag']
+        self.assertTrue(etag.startswith('W/"'))
+        revalidated = await AsyncClient().get('/api/async/feed/', headers={
+            'Authorization': f'Token {self.token.key}', 'If-None-Match': etag,
+        })
+        self.assertEqual(revalidated.status_code, 304)
+
+        await Post.objects.acreate(title='New', content='content', author=self.author)
+        self.assertNotEqual((await self.aget('/api/async/feed/'))['ETag'], etag)
+
+    async def test_concurrent_feed_misses_build_once(self):
+        get_feed = FeedFactory.get_feed
+        calls = []
+
+        def slow_get_feed(factory, *args, **kwargs):
+            calls.append(True)
+            time.sleep(0.2)
+            return get_feed(factory, *args, **kwargs)
+
+        with mock.patch.object(FeedFactory, 'get_feed', slow_get_feed):
+            responses = await asyncio.gather(*(self.aget('/api/async/feed/') for _ in range(3)))
+        self.assertEqual(calls, [True])
+        self.assertEqual(len({response.content for response in responses}), 1)
+
+    async def test_post_detail(self):
+        response = await self.aget(f'/api/async/posts/{self.post.id}/')
+        expected = await sync_to_async(self.client.get)(f'/api/posts/{self.post.id}/')
+        self.assertEqual(json.loads(response.content), expected.json())
+        self.assertEqual(response['ETag'], expected['ETag'])
+
+        revalidated = await AsyncClient().get(f'/api/async/posts/{self.post.id}/', headers={
+            'Authorization': f'Token {self.token.key}', 'If-None-Match': response['ETag'],
+        })
+        self.assertEqual(revalidated.status_code, 304)
+        self.assertEqual((await self.aget(f'/api/async/posts/{self.private.id}/')).status_code, 403)
+        self.assertEqual((await self.aget('/api/async/posts/999999/')).status_code, 404)
+
+    async def test_follow_info(self):
+        response = await self.aget(f'/api/async/users/{self.author.id}/follow-info/')
+        data = json.loads(response.content)
+        self.assertEqual((data['follower_count'], data['followers'], data['following']), (1, ['reader'], []))
+
+
+@override_settings(**dict(TEST_SETTINGS, FEED_TIMELINE_BACKEND='db'))
+class AsyncTimelineTests(TestCase):
+    """The async followed feed reads the materialized timeline without blocking calls."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('author', password='pass')
+        cls.reader = User.objects.create_user('reader', password='pass')
+        cls.token = Token.objects.create(user=cls.reader)
+        Follow.objects.create(follower=cls.reader, followed=cls.author)
+        cls.post = Post.objects.create(title='Post', content='content', author=cls.author)
+        Post.objects.create(title='Unfollowed', content='content', author=cls.reader)
+
+    async def test_followed_feed(self):
+        response = await AsyncClient().get(
+            '/api/async/feed/', {'filter': 'followed'}, headers={'Authorization': f'Token {self.token.key}'}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([post['id'] for post in json.loads(response.content)['results']], [self.post.id])
+
+
+@override_settings(**dict(TEST_SETTINGS, DATABASE_READ_ALIASES=['default'], CACHES={'default': {
+    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'db-routing-tests',
+}}))
+class ReadReplicaRoutingTests(TestCase):
+    """GETs read from a replica, except credentials and clients that just wrote."""
+
+    def setUp(self):
+        cache.clear()
+        self.seen = []
+        self.middleware = ReadOnlyRequestMiddleware(self.get_response)
+
+    def get_response(self, request):
+        self.seen.append(_read_alias.get())
+        return HttpResponse(status=201 if request.method == 'POST' else 200)
+
+    def request(self, method, token=None):
+        headers = {'HTTP_AUTHORIZATION': f'Token {token}'} if token else {}
+        self.middleware(getattr(RequestFactory(), method)('/api/posts/', **headers))
+        return self.seen[-1]
+
+    def test_writes_pin_the_client_to_the_primary(self):
+        self.assertEqual(self.request('get', 'abc'), 'default')
+        self.assertIsNone(self.request('post', 'abc'))
+        self.assertIsNone(self.request('get', 'abc'))
+        self.assertEqual(self.request('get', 'other'), 'default')
+        self.assertEqual(self.request('get'), 'default')
+
+
+class ReadWriteRouterTests(SimpleTestCase):
+    # Not a TestCase: reads inside its transaction would always use 'default'
+
+    def test_credentials_are_read_from_the_primary(self):
+        router = ReadWriteRouter()
+        token = _read_alias.set('replica')
+        try:
+            self.assertEqual(router.db_for_read(Post), 'replica')
+            for model in (Token, User, UserProfile):
+                self.assertEqual(router.db_for_read(model), 'default')
+        finally:
+            _read_alias.reset(token)
+
+
+class SqliteProfileTests(SimpleTestCase):
+    """SQLITE_PROFILE=performance: tuned PRAGMAs, and GETs read from the read-only 'read' alias."""
+    # The throwaway connections below share the backend class SimpleTestCase guards
+    databases = {'default'}
+
+    def setUp(self):
+        environ = {k: v for k, v in os.environ.items() if k != 'REPLICA_DATABASE_PATH'}
+        environ['SQLITE_PROFILE'] = 'performance'
+        with mock.patch.dict(os.environ, environ, clear=True):
+            self.profile = runpy.run_path(settings_module.__file__)
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        path = os.path.join(tmp.name, 'db.sqlite3')
+        databases = copy.deepcopy(self.profile['DATABASES'])
+        databases['default']['NAME'] = path
+        databases['read']['NAME'] = f'file:{path}?mode=ro'
+        self.connections = ConnectionHandler(databases)
+        self.addCleanup(self.connections.close_all)
+
+    def pragma(self, alias, name):
+        with self.connections[alias].cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_connections_are_tuned(self):
+        self.assertEqual(self.pragma('default', 'journal_mode'), 'wal')
+        for alias in ('default', 'read'):
+            self.assertEqual(self.pragma(alias, 'synchronous'), 1)  # NORMAL
+            self.assertEqual(self.pragma(alias, 'temp_store'), 2)  # MEMORY
+            self.assertEqual(self.pragma(alias, 'cache_size'), -65536)
+            self.assertEqual(self.pragma(alias, 'busy_timeout'), 20000)
+
+    def test_read_alias_is_read_only(self):
+        with self.connections['default'].cursor() as cursor:
+            cursor.execute('CREATE TABLE t (id INTEGER)')
+        self.assertEqual(self.pragma('read', 'journal_mode'), 'wal')
+        with self.assertRaisesMessage(OperationalError, 'readonly'):
+            with self.connections['read'].cursor() as cursor:
+                cursor.execute('INSERT INTO t VALUES (1)')
+
+    def test_safe_requests_read_from_the_read_alias(self):
+        self.assertEqual(self.profile['DATABASE_READ_ALIASES'], ['read'])
+        seen = []
+
+        def get_response(request):
+            seen.append((Post.objects.all().db, Token.objects.all().db))
+            return HttpResponse(status=201 if request.method == 'POST' else 200)
+
+        middleware = ReadOnlyRequestMiddleware(get_response)
+        with override_settings(DATABASE_READ_ALIASES=self.profile['DATABASE_READ_ALIASES'],
+                               DATABASE_ROUTERS=self.profile['DATABASE_ROUTERS'],
+                               CACHES=TEST_SETTINGS['CACHES']), \
+                mock.patch.dict(connections.settings, {'read': self.profile['DATABASES']['read']}):
+            middleware(RequestFactory().get('/api/posts/'))
+            middleware(RequestFactory().post('/api/posts/'))
+        self.assertEqual(seen, [('read', 'default'), ('default', 'default')])
+
+    def test_benchmark_counts_queries_on_every_alias(self):
+        def fn():
+            for alias in ('default', 'read'):
+                with self.connections[alias].cursor() as cursor:
+                    cursor.execute('SELECT 1')
+            return HttpResponse()
+
+        with mock.patch('posts.benchmarks.connections', self.connections):
+            self.assertEqual(measure(fn, iterations=3, warmup=0)['queries'], 2)
@@ -0,0 +1,195 @@
+"""
+Fan-out-on-write home timelines for the 'followed' feed.
+
+When FEED_TIMELINE_BACKEND is set, every new public post is pushed into its
+author's followers' timelines, so reading the followed feed is a range read
+instead of an IN (<everyone I follow>) query. Authors with more than
+FEED_FANOUT_MAX_FOLLOWERS followers are never fanned out; their posts are
+merged in at read time (hybrid fan-out) to avoid write storms.
+"""
+from django.conf import settings
+from django.db.models import Count, Q
+
+from .models import Post, Follow, TimelineEntry
+from .tasks import task
+
+
+class DatabaseTimelineStore:
+    """
+    Timelines stored as TimelineEntry rows. A timeline may grow 10% past
+    FEED_TIMELINE_MAX_LENGTH before it is trimmed back, so a push doesn't
+    have to trim every follower's timeline every time.
+    """
+
+    def __init__(self):
+        self.max_length = get_timeline_max_length()
+
+    def push(self, post, follower_ids):
+        TimelineEntry.objects.bulk_create(
+            [TimelineEntry(user_id=uid, post_id=post.id, created_at=post.created_at) for uid in follower_ids],
+            ignore_conflicts=True
+        )
+        self.trim(follower_ids)
+
+    def backfill(self, user_id, posts):
+        TimelineEntry.objects.bulk_create(
+            [TimelineEntry(user_id=user_id, post_id=p.id, created_at=p.created_at) for p in posts],
+            ignore_conflicts=True
+        )
+        self.trim([user_id])
+
+    def trim(self, user_ids):
+        over = TimelineEntry.objects.filter(user_id__in=user_ids).values('user_id') \
+            .annotate(n=Count('id')).filter(n__gt=self.max_length + self.max_length // 10) \
+            .values_list('user_id', flat=True)
+        for user_id in over:
+            oldest = TimelineEntry.objects.filter(user_id=user_id) \
+                .order_by('-created_at', '-id').values_list('id', flat=True)[self.max_length:]
+            TimelineEntry.objects.filter(id__in=list(oldest)).delete()
+
+    def remove_author(self, user_id, author_id):
+        TimelineEntry.objects.filter(user_id=user_id, post__author_id=author_id).delete()
+
+    def clear(self, user_id):
+        TimelineEntry.objects.filter(user_id=user_id).delete()
+
+    def timeline_filter(self, user_id):
+        # Lazy, so the async views can evaluate it: a LIMITed range read over
+        # timeline_user_created_idx, then post lookups by primary key
+        post_ids = TimelineEntry.objects.filter(user_id=user_id) \
+            .order_by('-created_at').values('post_id')[:self.max_length]
+        return Q(id__in=post_ids)
+
+
+class RedisTimelineStore:
+    """Timelines stored as one sorted set per user (score = post timestamp)."""
+
+    def __init__(self, alias):
+        from django_redis import get_redis_connection
+        self.redis = get_redis_connection(alias)
+        self.max_length = get_timeline_max_length()
+
+    def key(self, user_id):
+        return f'timeline:{user_id}'
+
+    def _add(self, pipe, user_id, entries):
+        key = self.key(user_id)
+        pipe.zadd(key, entries)
+        # Keep only the newest max_length entries
+        pipe.zremrangebyrank(key, 0, -(self.max_length + 1))
+
+    def push(self, post, follower_ids):
+        entry = {post.id: post.created_at.timestamp()}
+        pipe = self.redis.pipeline(transaction=False)
+        for uid in follower_ids:
+            self._add(pipe, uid, entry)
+        pipe.execute()
+
+    def backfill(self, user_id, posts):
+        entries = {p.id: p.created_at.timestamp() for p in posts}
+        if entries:
+            pipe = self.redis.pipeline(transaction=False)
+            self._add(pipe, user_id, entries)
+            pipe.execute()
+
+    def remove_author(self, user_id, author_id):
+        post_ids = list(Post.objects.filter(author_id=author_id).values_list('id', flat=True))
+        if post_ids:
+            self.redis.zrem(self.key(user_id), *post_ids)
+
+    def clear(self, user_id):
+        self.redis.delete(self.key(user_id))
+
+    def timeline_filter(self, user_id):
+        post_ids = [int(pid) for pid in self.redis.zrevrange(self.key(user_id), 0, -1)]
+        return Q(id__in=post_ids)
+
+
+def get_timeline_store():
+    """Return the configured timeline store, or None when fan-out is disabled."""
+    backend = getattr(settings, 'FEED_TIMELINE_BACKEND', None)
+    if not backend:
+        return None
+    if backend == 'db':
+        return DatabaseTimelineStore()
+    if backend == 'redis':
+        return RedisTimelineStore(getattr(settings, 'FEED_TIMELINE_REDIS_ALIAS', 'default'))
+    raise ValueError(f"Unknown FEED_TIMELINE_BACKEND: {backend}")
+
+
+def timelines_enabled():
+    return get_timeline_store() is not None
+
+
+def get_fanout_max_followers():
+    return getattr(settings, 'FEED_FANOUT_MAX_FOLLOWERS', 10000)
+
+
+def get_timeline_max_length():
+    return getattr(settings, 'FEED_TIMELINE_MAX_LENGTH', 800)
+
+
+def _follower_ids(author_id):
+    return Follow.objects.filter(followed_id=author_id).values_list('follower_id', flat=True)
+
+
+def fan_out_post(post):
+    """Push a new public post into its author's followers' timelines."""
+    store = get_timeline_store()
+    if store is None or post.privacy != 'public':
+        return
+    follower_ids = list(_follower_ids(post.author_id)[:get_fanout_max_followers() + 1])
+    if len(follower_ids) > get_fanout_max_followers():
+        # Celebrity author: merged at read time instead
+        return
+    store.push(post, follower_ids)
+
+
+@task()
+def fan_out_new_post(post_id):
+    """Queued fan_out_post for a post created during a request."""
+    post = Post.objects.filter(pk=post_id).first()
+    if post is not None:
+        fan_out_post(post)
+
+
+@task()
+def backfill_timeline(user_id, author_id):
+    """Copy an author's recent public posts into a new follower's timeline."""
+    store = get_timeline_store()
+    if store is None:
+        return
+    # Queued backfills can run after an unfollow
+    if not Follow.objects.filter(follower_id=user_id, followed_id=author_id).exists():
+        return
+    posts = Post.objects.filter(author_id=author_id, privacy='public') \
+        .order_by('-created_at', '-id')[:get_timeline_max_length()]
+    store.backfill(user_id, posts)
+
+
+def remove_from_timeline(user_id, author_id):
+    store = get_timeline_store()
+    if store is not None:
+        store.remove_author(user_id, author_id)
+
+
+def celebrity_followed_ids(user_id):
+    """Ids of the accounts `user_id` follows that are too big to fan out."""
+    return Follow.objects.filter(
+        follower_id=user_id,
+        followed__profile__follower_count__gt=get_fanout_max_followers()
+    ).values_list('followed_id', flat=True)
+
+
+def timeline_posts(user_id):
+    """
+    Posts for the 'followed' feed read from the materialized timeline, merged
+    with celebrity authors' posts. Returns None when fan-out is disabled.
+    """
+    store = get_timeline_store()
+    if store is None:
+        return None
+    return Post.objects.filter(
+        store.timeline_filter(user_id) | Q(author_id__in=celebrity_followed_ids(user_id)),
+        privacy='public'
+    )
@@ -2,20 +2,26 @@ from django.urls import path
 from .views import (
     UserListCreate, UserDetailView,
     PostView,
-    CommentListCreateView, CommentDetailView,
+    CommentListCreateView, CommentDetailView, PostCommentListView,
     PostLikeListCreateView, PostLikeDetailView,
     CommentLikeListCreateView, CommentLikeDetailView, FollowView, UnfollowView, UserFollowView, NewsFeedView,
+    UserFollowersView, UserFollowingView, SearchView,
+    PostLikeBulkCreateView, CommentLikeBulkCreateView, FollowBulkView,
 )
+from .views_async import AsyncNewsFeedView, AsyncPostView, AsyncUserFollowView
 
 urlpatterns = [
     # User endpoints
     path('users/', UserListCreate.as_view(), name='user-list-create'),
     path('users/<int:pk>/', UserDetailView.as_view(), name='user-detail'),
     path('users/<int:user_id>/follow-info/', UserFollowView.as_view(), name='user-follow-info'),
+    path('users/<int:user_id>/followers/', UserFollowersView.as_view(), name='user-followers'),
+    path('users/<int:user_id>/following/', UserFollowingView.as_view(), name='user-following'),
 
     # Post endpoints
     path('posts/', PostView.as_view(), name='post-list-create'),
     path('posts/<int:pk>/', PostView.as_view(), name='post-detail'),
+    path('posts/<int:pk>/comments/', PostCommentListView.as_view(), name='post-comment-list'),
 
     # Comment endpoints
     path('comments/', CommentListCreateView.as_view(), name='comment-list-create'),
@@ -23,17 +29,29 @@ urlpatterns = [
 
     # PostLike endpoints
     path('post-likes/', PostLikeListCreateView.as_view(), name='post-like-list-create'),
+    path('post-likes/bulk/', PostLikeBulkCreateView.as_view(), name='post-like-bulk-create'),
     path('post-likes/<int:pk>/', PostLikeDetailView.as_view(), name='post-like-detail'),
 
     # CommentLike endpoints
     path('comment-likes/', CommentLikeListCreateView.as_view(), name='comment-like-list-create'),
+    path('comment-likes/bulk/', CommentLikeBulkCreateView.as_view(), name='comment-like-bulk-create'),
     path('comment-likes/<int:pk>/', CommentLikeDetailView.as_view(), name='comment-like-detail'),
 
     # Follow/Unfollow endpoints
+    path('follow/bulk/', FollowBulkView.as_view(), name='follow-bulk'),
     path('follow/<int:followed_user_id>/', FollowView.as_view(), name='follow-user'),
     path('unfollow/<int:followed_user_id>/', UnfollowView.as_view(), name='unfollow-user'),
 
     # Feed Endpoints
     path('feed/', NewsFeedView.as_view(), name='news-feed'),
+
+    # Search
+    path('search/', SearchView.as_view(), name='search'),
+
+    # Async (ASGI-native) read endpoints
+    path('async/feed/', AsyncNewsFeedView.as_view(), name='async-news-feed'),
+    path('async/posts/', AsyncPostView.as_view(), name='async-post-list'),
+    path('async/posts/<int:pk>/', AsyncPostView.as_view(), name='async-post-detail'),
+    path('async/users/<int:user_id>/follow-info/', AsyncUserFollowView.as_view(), name='async-user-follow-info'),
     
 ]
@@ -1,9 +1,29 @@
+from django.conf import settings
+from rest_framework.exceptions import ValidationError
+
+from .authentication import get_user_role
+
+
 def has_role(user, role_name):
     """
     Check if a user has a specific role (admin, user, guest).
+    The role is served from the auth cache, so this costs no query once warm.
     """
-    return (
-        user.is_authenticated and 
-        hasattr(user, 'profile') and 
-        getattr(user.profile, 'role', None) == role_name
-    )
+    return user.is_authenticated and get_user_role(user) == role_name
+
+
+def parse_id_list(data, field):
+    """
+    Read a list of integer ids from `data[field]` for the bulk endpoints.
+    Duplicates are dropped, order is kept. Raises ValidationError (400).
+    """
+    max_items = getattr(settings, 'BULK_MAX_ITEMS', 100)
+    ids = data.get(field) if hasattr(data, 'get') else None
+    if not isinstance(ids, list) or not ids:
+        raise ValidationError({field: 'Expected a non-empty list of ids.'})
+    if len(ids) > max_items:
+        raise ValidationError({field: f'At most {max_items} items per request.'})
+    # JSON integers only: int() would also take 1.5, "1" or true as post 1
+    if not all(isinstance(i, int) and not isinstance(i, bool) for i in ids):
+        raise ValidationError({field: 'Ids must be integers.'})
+    return list(dict.fromkeys(ids))
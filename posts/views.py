@@ -1,28 +1,39 @@
 # posts/views.py
+from django.http import Http404
 from django.shortcuts import get_object_or_404
+from django.urls import reverse
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly
-from rest_framework.authentication import TokenAuthentication
-from .models import Post, Comment, PostLike, CommentLike, Follow
+from .authentication import CachedTokenAuthentication
+from .models import Post, Comment, PostLike, CommentLike, Follow, UserProfile
 from .serializers import (
     UserSerializer, PostSerializer, CommentSerializer,
-    PostLikeSerializer, CommentLikeSerializer
+    PostLikeSerializer, CommentLikeSerializer, FollowerSerializer, FollowingSerializer,
+    compact_page,
 )
 from factories.post_factory import PostFactory
 from django.contrib.auth.models import User
 from allauth.socialaccount.providers.google.views import GoogleOAuth2Adapter
 from dj_rest_auth.registration.views import SocialLoginView
-from rest_framework.pagination import PageNumberPagination
-from django.db.models import Q
+from django.db.models import Q, Exists, OuterRef
 from rest_framework.permissions import IsAuthenticated
-from django.core.cache import cache
 from factories.feed_factory import FeedFactory
 from .permissions import IsAuthorOrReadOnly, IsAuthorOrAdmin
-from .utils import has_role
-from .base import BaseLoggedAPIView
-from hashlib import md5
+from .utils import has_role, parse_id_list
+from .counters import rebuild_post_counters, rebuild_comment_counters, recount_follow_counts
+from .feed_cache import bump_global_feed_generation, bump_user_feed_generation
+from .timeline import backfill_timeline, timelines_enabled
+from .ranking import recompute_engagement_scores
+from .search import search_posts, search_comments
+from .conditional import post_etag, weak_etag, etag_matches, not_modified, with_etag
+from .compression import compressed_variants, variant_response
+from .like_buffer import get_like_buffer, pending_likes_for
+from .base import BaseLoggedAPIView, PaginatedListMixin, wants_compact
+from .pagination import FeedPagination, FeedCursorPagination, CommentCursorPagination, ListCursorPagination
+from .feed_cache import feed_page_key, get_feed_generation, get_or_rebuild
+from .metrics import record_cache
 from rest_framework.permissions import AllowAny
 
 
@@ -39,11 +50,11 @@ logger.info("API initialized successfully.")
 
 
 
-class UserListCreate(BaseLoggedAPIView):
+class UserListCreate(PaginatedListMixin, BaseLoggedAPIView):
     def get(self, request):
-        users = User.objects.all()
-        serializer = UserSerializer(users, many=True)
-        return Response(serializer.data)
+        # Newest first by id: auth_user has no date_joined index to seek on
+        users = User.objects.order_by('-id')
+        return self.list_response(request, users, UserSerializer)
 
     def post(self, request):
         serializer = UserSerializer(data=request.data)
@@ -54,7 +65,7 @@ class UserListCreate(BaseLoggedAPIView):
 
 
 class UserDetailView(BaseLoggedAPIView):
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthorOrReadOnly]
 
     def get(self, request, pk):
@@ -82,8 +93,8 @@ class UserDetailView(BaseLoggedAPIView):
 # -----------------------------
 #   POST VIEWS
 # -----------------------------
-class PostView(BaseLoggedAPIView):
-    authentication_classes = [TokenAuthentication]
+class PostView(PaginatedListMixin, BaseLoggedAPIView):
+    authentication_classes = [CachedTokenAuthentication]
 
     def get_permissions(self):
         if self.request.method == 'POST':
@@ -101,12 +112,30 @@ class PostView(BaseLoggedAPIView):
         user = request.user if request.user.is_authenticated else None
 
         if pk:
-            post = self.get_object(pk)
+            if request.headers.get('If-None-Match'):
+                # Revalidation: one narrow query decides, no relations or serializer
+                row = Post.objects.filter(pk=pk).values_list(
+                    'author_id', 'privacy', 'updated_at', 'like_count', 'comment_count'
+                ).first()
+                if row is None:
+                    raise Http404
+                author_id, privacy, *version = row
+                if privacy == 'private' and (not user or author_id != user.id):
+                    return Response({'detail': 'This post is private.'}, status=status.HTTP_403_FORBIDDEN)
+                etag = post_etag(pk, *version, pending_likes=len(pending_likes_for([pk]).get(pk, ())))
+                if etag_matches(request, etag):
+                    return not_modified(etag)
+
+            post = get_object_or_404(FeedFactory.with_relations(Post.objects.all()), pk=pk)
             if post.privacy == 'private':
                 if not user or post.author != user:
                     return Response({'detail': 'This post is private.'}, status=status.HTTP_403_FORBIDDEN)
             serializer = PostSerializer(post)
-            return Response(serializer.data)
+            etag = post_etag(
+                post.pk, post.updated_at, post.like_count, post.comment_count,
+                pending_likes=len(pending_likes_for([post.pk]).get(post.pk, ()))
+            )
+            return with_etag(Response(serializer.data), etag)
 
         # List view: return public posts for guests; public + own private posts for authenticated users
         if user:
@@ -114,8 +143,8 @@ class PostView(BaseLoggedAPIView):
         else:
             posts = Post.objects.filter(privacy='public')
 
-        serializer = PostSerializer(posts, many=True)
-        return Response(serializer.data)
+        posts = FeedFactory.with_relations(posts.order_by('-created_at', '-id'))
+        return self.list_response(request, posts, PostSerializer, compact_page=compact_page)
 
 
     def post(self, request):
@@ -166,14 +195,13 @@ class PostView(BaseLoggedAPIView):
 #   COMMENT VIEWS
 # -----------------------------
 
-class CommentListCreateView(APIView):
-    authentication_classes = [TokenAuthentication]
+class CommentListCreateView(PaginatedListMixin, APIView):
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticatedOrReadOnly]
 
     def get(self, request):
-        comments = Comment.objects.all()
-        serializer = CommentSerializer(comments, many=True)
-        return Response(serializer.data)
+        comments = Comment.objects.select_related('author').order_by('-created_at', '-id')
+        return self.list_response(request, comments, CommentSerializer)
 
     def post(self, request):
         if has_role(request.user, 'guest'):
@@ -182,14 +210,35 @@ class CommentListCreateView(APIView):
         serializer = CommentSerializer(data=request.data, context={'request': request})
         if serializer.is_valid():
             comment = serializer.save()
-            logger.info(f"Created comment #{comment.id} by {comment.author.username}")
+            logger.info("Created comment #%s by user %s", comment.id, comment.author_id)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
-        logger.error(f"Error creating comment: {serializer.errors}")
+        logger.error("Error creating comment: %s", serializer.errors)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+class PostCommentListView(APIView):
+    """
+    All comments of one post, newest first, cursor-paginated.
+    Feed responses only embed the latest few.
+    """
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [IsAuthenticatedOrReadOnly]
+
+    def get(self, request, pk):
+        post = get_object_or_404(Post, pk=pk)
+        if post.privacy == 'private' and post.author != request.user:
+            return Response({'detail': 'This post is private.'}, status=status.HTTP_403_FORBIDDEN)
+
+        comments = Comment.objects.filter(post=post).select_related('author') \
+            .order_by('-created_at', '-id')
+        paginator = CommentCursorPagination()
+        page = paginator.paginate_queryset(comments, request)
+        serializer = CommentSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+
 class CommentDetailView(APIView):
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthorOrReadOnly]
 
     def get_object(self, pk):
@@ -225,7 +274,7 @@ class CommentDetailView(APIView):
 
 
 class PostLikeDetailView(APIView):
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticatedOrReadOnly]
 
     def get_object(self, pk):
@@ -257,14 +306,13 @@ class PostLikeDetailView(APIView):
 # -----------------------------
 #   COMMENT LIKE VIEWS
 # -----------------------------
-class CommentLikeListCreateView(APIView):
-    authentication_classes = [TokenAuthentication]
+class CommentLikeListCreateView(PaginatedListMixin, APIView):
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticatedOrReadOnly]
 
     def get(self, request):
-        comment_likes = CommentLike.objects.all()
-        serializer = CommentLikeSerializer(comment_likes, many=True)
-        return Response(serializer.data)
+        comment_likes = CommentLike.objects.order_by('-created_at', '-id')
+        return self.list_response(request, comment_likes, CommentLikeSerializer)
 
     def post(self, request):
         serializer = CommentLikeSerializer(data=request.data, context={'request': request})
@@ -276,8 +324,44 @@ class CommentLikeListCreateView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+class CommentLikeBulkCreateView(APIView):
+    """
+    Like many comments at once: {"comments": [1, 2, 3]}.
+    One query finds the comments, one finds existing likes, one inserts.
+    """
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        ids = parse_id_list(request.data, 'comments')
+        comments = dict(Comment.objects.filter(id__in=ids).values_list('id', 'author_id'))
+        existing = set(CommentLike.objects.filter(user=request.user, comment_id__in=ids)
+                       .values_list('comment_id', flat=True))
+
+        results, to_create = [], []
+        for comment_id in ids:
+            if comment_id not in comments:
+                results.append({'comment': comment_id, 'status': 'not_found'})
+            elif comments[comment_id] == request.user.id:
+                results.append({'comment': comment_id, 'status': 'rejected', 'error': 'You cannot like your own comment.'})
+            elif comment_id in existing:
+                results.append({'comment': comment_id, 'status': 'already_liked'})
+            else:
+                to_create.append(CommentLike(user=request.user, comment_id=comment_id))
+                results.append({'comment': comment_id, 'status': 'created'})
+
+        if to_create:
+            CommentLike.objects.bulk_create(to_create, ignore_conflicts=True)
+            # bulk_create skips signals. Recount rather than add len(to_create):
+            # ignore_conflicts hides likes a concurrent request inserted first
+            rebuild_comment_counters(Comment.objects.filter(id__in=[like.comment_id for like in to_create]))
+            logger.info("User %s liked %s comments in bulk", request.user.id, len(to_create))
+
+        return Response({'created': len(to_create), 'results': results}, status=status.HTTP_200_OK)
+
+
 class CommentLikeDetailView(APIView):
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticatedOrReadOnly]
 
     def get_object(self, pk):
@@ -298,7 +382,7 @@ class CommentLikeDetailView(APIView):
     
 
 class ProtectedView(APIView):
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
 
 
@@ -336,68 +420,189 @@ class GoogleLogin(SocialLoginView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-class FeedPagination(PageNumberPagination):
-    page_size = 10
-    page_size_query_param = 'page_size'
-    max_page_size = 100
-
-class NewsFeedView(APIView):
+class NewsFeedView(BaseLoggedAPIView):
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [AllowAny]
 
     def get(self, request):
         # Handle unauthenticated users
         user = request.user if request.user.is_authenticated else None
         filter_param = request.query_params.get('filter')
-        page_number = request.query_params.get('page', 1)
         page_size = request.query_params.get('page_size', 10)
+        compact = wants_compact(request)
 
-        # Safe cache key even for anonymous users
-        user_id = user.id if user else 'anon'
-        key_raw = f"feed:{user_id}:{filter_param}:{page_number}:{page_size}"
-        cache_key = md5(key_raw.encode()).hexdigest()
+        # ?pagination=cursor switches to keyset pagination (no COUNT, no OFFSET)
+        if request.query_params.get('pagination') == 'cursor':
+            paginator = FeedCursorPagination()
+            position = request.query_params.get('cursor', '')
+        else:
+            paginator = FeedPagination()
+            position = request.query_params.get('page', 1)
+
+        # Safe cache key even for anonymous users. The generation changes whenever
+        # a post/comment/like/follow is written; the page is cached together
+        # with the generation it was built for.
+        generation = get_feed_generation(user.id if user else None)
+        key_raw, cache_key = feed_page_key(
+            'feed-body', user.id if user else 'anon', filter_param, paginator, position, page_size, compact
+        )
+
+        # Key and generation identify this exact page version: revalidation
+        # needs no cache read and no database query
+        etag = weak_etag(key_raw, generation)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+
+        # The cache holds final JSON bytes, precompressed per encoding, so a hit
+        # skips serialization, rendering and compression. Other renderers
+        # (browsable API) always take the uncached path.
+        if request.accepted_renderer.format != 'json':
+            return with_etag(self.build_page(request, user, filter_param, paginator, compact), etag)
+
+        def build():
+            page = self.build_page(request, user, filter_param, paginator, compact)
+            with self.timed('render'):
+                return compressed_variants(page.data)
+
+        # One request rebuilds a missing or outdated page; concurrent ones get
+        # the previous copy meanwhile, which may be one generation behind
+        variants, built_for, rebuilt = get_or_rebuild(cache_key, generation, build)
+        record_cache(hit=not rebuilt)
+        return with_etag(variant_response(request, variants), weak_etag(key_raw, built_for))
+
+    def build_page(self, request, user, filter_param, paginator, compact):
+        feed = FeedFactory(user).get_feed(filter_param)
+        with self.timed('query'):
+            result_page = paginator.paginate_queryset(feed, request)
+        with self.timed('serialize'):
+            if compact:
+                data, users = compact_page(result_page)
+            else:
+                data = PostSerializer(result_page, many=True).data
+        paginated_response = paginator.get_paginated_response(data)
+        if compact:
+            paginated_response.data['users'] = users
+        return paginated_response
 
-        # Check cache
-        cached_response = cache.get(cache_key)
-        if cached_response:
-            return Response(cached_response)
 
-        # Get feed
-        feed = FeedFactory(user).get_feed(filter_param)
+class SearchView(BaseLoggedAPIView):
+    """
+    Full-text search: /api/search/?q=<words>&type=posts|comments.
+    Ranked by relevance, privacy-filtered like the feed, cursor-paginated.
+    """
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({'q': ['This query parameter is required.']}, status=status.HTTP_400_BAD_REQUEST)
+
+        if request.query_params.get('type', 'posts') == 'comments':
+            results, serializer_class = search_comments(request.user, query), CommentSerializer
+        else:
+            results, serializer_class = FeedFactory.with_relations(search_posts(request.user, query)), PostSerializer
+
+        paginator = ListCursorPagination()
+        with self.timed('query'):
+            page = paginator.paginate_queryset(results, request, view=self)
+        with self.timed('serialize'):
+            data = serializer_class(page, many=True).data
+        return paginator.get_paginated_response(data)
 
-        # Paginate
-        paginator = FeedPagination()
-        result_page = paginator.paginate_queryset(feed, request)
-        serializer = PostSerializer(result_page, many=True)
-        paginated_response = paginator.get_paginated_response(serializer.data)
 
-        # Cache paginated data
-        cache.set(cache_key, paginated_response.data, timeout=60)
-        return paginated_response
-    
 import logging
 logger = logging.getLogger(__name__)
 
-class PostLikeListCreateView(APIView):
-    authentication_classes = [TokenAuthentication]
+class PostLikeListCreateView(PaginatedListMixin, APIView):
+    authentication_classes = [CachedTokenAuthentication]
     
 
     def get(self, request):
-        post_likes = PostLike.objects.all()
-        serializer = PostLikeSerializer(post_likes, many=True)
-        return Response(serializer.data)
+        post_likes = PostLike.objects.order_by('-created_at', '-id')
+        return self.list_response(request, post_likes, PostLikeSerializer)
 
     def post(self, request):
+        buffer = get_like_buffer()
+        if buffer is not None:
+            return self.buffered_like(request, buffer)
+
         serializer = PostLikeSerializer(data=request.data, context={'request': request})
         if serializer.is_valid():
             post_like = serializer.save()
-            logger.info(f"{post_like.user.username} liked {post_like.post.title}")
+            logger.info("User %s liked post #%s", post_like.user_id, post_like.post_id)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
-        logger.error(f"Error creating post like: {serializer.errors}")
+        logger.error("Error creating post like: %s", serializer.errors)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    def buffered_like(self, request, buffer):
+        """
+        Write-behind path: record the like in the buffer and return 202.
+        The PostLike row is created by the next flush.
+        """
+        if not request.user.is_authenticated:
+            return Response({'detail': 'Authentication credentials were not provided.'}, status=status.HTTP_401_UNAUTHORIZED)
+        try:
+            post_id = int(request.data.get('post'))
+        except (TypeError, ValueError):
+            return Response({'post': ['A valid post id is required.']}, status=status.HTTP_400_BAD_REQUEST)
+
+        # One query for both the ownership and the already-persisted checks
+        row = Post.objects.filter(pk=post_id).annotate(
+            liked=Exists(PostLike.objects.filter(post=OuterRef('pk'), user=request.user))
+        ).values_list('author_id', 'liked').first()
+        if row is None:
+            return Response({'post': [f'Invalid pk "{post_id}" - object does not exist.']}, status=status.HTTP_400_BAD_REQUEST)
+        author_id, liked = row
+        if author_id == request.user.id:
+            return Response({'non_field_errors': ['You cannot like your own post.']}, status=status.HTTP_400_BAD_REQUEST)
+        if liked or not buffer.add(post_id, request.user.id, request.user.username):
+            return Response({'non_field_errors': ['You have already liked this post.']}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({'user': request.user.id, 'post': post_id, 'status': 'pending'}, status=status.HTTP_202_ACCEPTED)
+
+
+class PostLikeBulkCreateView(APIView):
+    """
+    Like many posts at once: {"posts": [1, 2, 3]}.
+    One query finds the posts, one finds existing likes, one inserts.
+    """
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        ids = parse_id_list(request.data, 'posts')
+        posts = dict(Post.objects.filter(id__in=ids).values_list('id', 'author_id'))
+        existing = set(PostLike.objects.filter(user=request.user, post_id__in=ids)
+                       .values_list('post_id', flat=True))
+
+        results, to_create = [], []
+        for post_id in ids:
+            if post_id not in posts:
+                results.append({'post': post_id, 'status': 'not_found'})
+            elif posts[post_id] == request.user.id:
+                results.append({'post': post_id, 'status': 'rejected', 'error': 'You cannot like your own post.'})
+            elif post_id in existing:
+                results.append({'post': post_id, 'status': 'already_liked'})
+            else:
+                to_create.append(PostLike(user=request.user, post_id=post_id))
+                results.append({'post': post_id, 'status': 'created'})
+
+        if to_create:
+            PostLike.objects.bulk_create(to_create, ignore_conflicts=True)
+            # bulk_create skips signals: counters and feed cache by hand, recounted
+            # because ignore_conflicts hides likes a concurrent request inserted first
+            liked_posts = Post.objects.filter(id__in=[like.post_id for like in to_create])
+            rebuild_post_counters(liked_posts)
+            recompute_engagement_scores(liked_posts)
+            bump_global_feed_generation()
+            logger.info("User %s liked %s posts in bulk", request.user.id, len(to_create))
+
+        return Response({'created': len(to_create), 'results': results}, status=status.HTTP_200_OK)
+
 
 class FollowView(APIView):
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
 
     def post(self, request, followed_user_id):
         if has_role(request.user, 'guest'):
@@ -413,21 +618,62 @@ class FollowView(APIView):
         existing_follow = Follow.objects.filter(follower=request.user, followed=followed_user)
 
         if existing_follow.exists():
-            # Log the issue and return the response
-            print(f"[DEBUG] User {request.user.username} is already following {followed_user.username}.")
+            logger.debug("User %s is already following %s", request.user.id, followed_user.id)
             return Response({"message": "You are already following this user."}, status=status.HTTP_400_BAD_REQUEST)
 
         # Create a new follow relationship
         Follow.objects.create(follower=request.user, followed=followed_user)
 
-        # Log the successful creation of the follow relationship
-        print(f"[DEBUG] User {request.user.username} successfully followed {followed_user.username}.")
+        # Counters and the feed cache update inline (signals); the timeline
+        # backfill is queued (posts/tasks.py)
+        logger.debug("User %s followed %s", request.user.id, followed_user.id)
 
         # Return a response indicating successful follow
         return Response({"message": f"You have successfully followed {followed_user.username}."}, status=status.HTTP_201_CREATED)
     
+class FollowBulkView(APIView):
+    """
+    Follow many users at once: {"users": [1, 2, 3]}.
+    One query finds the users, one finds existing follows, one inserts.
+    """
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        if has_role(request.user, 'guest'):
+            return Response({'error': 'Guests cannot follow or unfollow users.'}, status=status.HTTP_403_FORBIDDEN)
+        ids = parse_id_list(request.data, 'users')
+        users = set(User.objects.filter(id__in=ids).values_list('id', flat=True))
+        existing = set(Follow.objects.filter(follower=request.user, followed_id__in=ids)
+                       .values_list('followed_id', flat=True))
+
+        results, to_create = [], []
+        for user_id in ids:
+            if user_id not in users:
+                results.append({'user': user_id, 'status': 'not_found'})
+            elif user_id == request.user.id:
+                results.append({'user': user_id, 'status': 'rejected', 'error': 'You cannot follow yourself.'})
+            elif user_id in existing:
+                results.append({'user': user_id, 'status': 'already_following'})
+            else:
+                to_create.append(Follow(follower=request.user, followed_id=user_id))
+                results.append({'user': user_id, 'status': 'created'})
+
+        if to_create:
+            Follow.objects.bulk_create(to_create, ignore_conflicts=True)
+            # bulk_create skips signals: counters, feed cache and timelines by hand
+            recount_follow_counts([request.user.id] + [follow.followed_id for follow in to_create])
+            bump_user_feed_generation(request.user.id)
+            if timelines_enabled():
+                for follow in to_create:
+                    backfill_timeline.delay(request.user.id, follow.followed_id)
+            logger.info("User %s followed %s users in bulk", request.user.id, len(to_create))
+
+        return Response({'created': len(to_create), 'results': results}, status=status.HTTP_200_OK)
+
+
 class UnfollowView(APIView):
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
 
     def post(self, request, followed_user_id):
         # Get the user that will be unfollowed
@@ -448,26 +694,57 @@ class UnfollowView(APIView):
         return Response({"message": f"You have unfollowed {followed_user.username}"}, status=status.HTTP_200_OK)
 
 class UserFollowView(APIView):
-    authentication_classes = [TokenAuthentication]
+    """
+    Follower/following counts (denormalized on UserProfile) plus the most
+    recent page of each list; the full lists are paginated separately.
+    """
+    authentication_classes = [CachedTokenAuthentication]
     
     def get(self, request, user_id):
         # Get the user whose followers and following we want to display
-        user = User.objects.get(id=user_id)
-
-        # Get the list of followers (people who follow this user)
-        followers = Follow.objects.filter(followed=user).values_list('follower', flat=True)
-        follower_users = User.objects.filter(id__in=followers)
+        user = get_object_or_404(User, id=user_id)
+        counts = UserProfile.objects.filter(user=user) \
+            .values_list('follower_count', 'following_count').first() or (0, 0)
+        preview = ListCursorPagination.page_size
 
-        # Get the list of following (people this user follows)
-        following = Follow.objects.filter(follower=user).values_list('followed', flat=True)
-        following_users = User.objects.filter(id__in=following)
+        # Most recent followers (people who follow this user)
+        followers = Follow.objects.filter(followed=user).order_by('-created_at', '-id') \
+            .values_list('follower__username', flat=True)[:preview]
 
-        # Prepare the response data
-        followers_data = [user.username for user in follower_users]
-        following_data = [user.username for user in following_users]
+        # Most recent following (people this user follows)
+        following = Follow.objects.filter(follower=user).order_by('-created_at', '-id') \
+            .values_list('followed__username', flat=True)[:preview]
 
         # Return the response with followers and following
         return Response({
-            "followers": followers_data,
-            "following": following_data
+            "follower_count": counts[0],
+            "following_count": counts[1],
+            "followers": list(followers),
+            "following": list(following),
+            "followers_url": request.build_absolute_uri(reverse('user-followers', args=[user.id])),
+            "following_url": request.build_absolute_uri(reverse('user-following', args=[user.id])),
         })
+
+
+class UserFollowersView(PaginatedListMixin, APIView):
+    """Everyone following a user, most recent first, cursor-paginated."""
+    authentication_classes = [CachedTokenAuthentication]
+
+    def get(self, request, user_id):
+        user = get_object_or_404(User, id=user_id)
+        follows = Follow.objects.filter(followed=user).select_related('follower') \
+            .only('id', 'created_at', 'follower_id', 'follower__username') \
+            .order_by('-created_at', '-id')
+        return self.list_response(request, follows, FollowerSerializer)
+
+
+class UserFollowingView(PaginatedListMixin, APIView):
+    """Everyone a user follows, most recent first, cursor-paginated."""
+    authentication_classes = [CachedTokenAuthentication]
+
+    def get(self, request, user_id):
+        user = get_object_or_404(User, id=user_id)
+        follows = Follow.objects.filter(follower=user).select_related('followed') \
+            .only('id', 'created_at', 'followed_id', 'followed__username') \
+            .order_by('-created_at', '-id')
+        return self.list_response(request, follows, FollowingSerializer)
@@ -0,0 +1,172 @@
+# posts/views_async.py
+"""
+ASGI-native versions of the hot read endpoints. They use the async ORM and
+the async cache API, so under an ASGI server a worker can keep many slow feed
+reads in flight instead of parking one thread per request.
+"""
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.db.models import Q
+from django.http import Http404, HttpResponse, HttpResponseNotModified
+from django.urls import reverse
+from django.views import View
+from rest_framework import exceptions, status
+from rest_framework.request import Request
+
+from factories.feed_factory import FeedFactory
+from .authentication import aauthenticate_token
+from .base import wants_compact
+from .compression import compressed_variants, variant_response
+from .conditional import etag_matches, post_etag, weak_etag, with_etag
+from .feed_cache import aget_feed_generation, aget_or_rebuild, feed_page_key
+from .like_buffer import pending_likes_for
+from .metrics import record_cache
+from .models import Post, Follow, UserProfile
+from .pagination import FeedPagination, FeedCursorPagination, ListCursorPagination
+from .renderers import render_json
+from .serializers import PostSerializer, compact_page
+
+
+def json_response(data, status_code=status.HTTP_200_OK):
+    return HttpResponse(render_json(data), status=status_code, content_type='application/json')
+
+
+def not_modified(etag):
+    return with_etag(HttpResponseNotModified(), etag)
+
+
+async def apending_like_count(post_id):
+    # The Redis like buffer is a blocking client
+    pending = await sync_to_async(pending_likes_for)([post_id])
+    return len(pending.get(post_id, ()))
+
+
+class AsyncAPIView(View):
+    """
+    Minimal async base view: token authentication and DRF-style error bodies.
+    `request.user` is the authenticated User or None.
+    """
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            request.user = await aauthenticate_token(request)
+            return await super().dispatch(request, *args, **kwargs)
+        except exceptions.APIException as exc:
+            return json_response({'detail': exc.detail}, exc.status_code)
+        except Http404:
+            return json_response({'detail': 'Not found.'}, status.HTTP_404_NOT_FOUND)
+
+    async def paginate(self, paginator, queryset, request, compact=False):
+        # Paginators read query params from a DRF Request
+        drf_request = Request(request)
+        page = await paginator.apaginate_queryset(queryset, drf_request)
+        if compact:
+            data, users = compact_page(page)
+        else:
+            data = PostSerializer(page, many=True).data
+        page_data = paginator.get_paginated_response(data).data
+        if compact:
+            page_data['users'] = users
+        return page_data
+
+
+class AsyncNewsFeedView(AsyncAPIView):
+
+    async def get(self, request):
+        user = request.user
+        filter_param = request.GET.get('filter')
+        page_size = request.GET.get('page_size', 10)
+        compact = wants_compact(Request(request))
+
+        if request.GET.get('pagination') == 'cursor':
+            paginator = FeedCursorPagination()
+            position = request.GET.get('cursor', '')
+        else:
+            paginator = FeedPagination()
+            position = request.GET.get('page', 1)
+
+        # Same scheme as NewsFeedView; separate namespace because the cached
+        # pagination links point at the async URLs
+        generation = await aget_feed_generation(user.id if user else None)
+        key_raw, cache_key = feed_page_key(
+            'async-feed-body', user.id if user else 'anon', filter_param, paginator, position, page_size, compact
+        )
+        etag = weak_etag(key_raw, generation)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+
+        async def build():
+            # Building the queryset may read a Redis timeline (blocking client)
+            feed = await sync_to_async(FeedFactory(user).get_feed)(filter_param)
+            return compressed_variants(await self.paginate(paginator, feed, request, compact))
+
+        # Rendered, precompressed bytes, rebuilt by one request at a time (see NewsFeedView)
+        variants, built_for, rebuilt = await aget_or_rebuild(cache_key, generation, build)
+        record_cache(hit=not rebuilt)
+        return with_etag(variant_response(request, variants), weak_etag(key_raw, built_for))
+
+
+class AsyncPostView(AsyncAPIView):
+
+    async def get(self, request, pk=None):
+        user = request.user
+
+        if pk:
+            if request.headers.get('If-None-Match'):
+                # Revalidation: one narrow query decides (see PostView)
+                row = await Post.objects.filter(pk=pk).values_list(
+                    'author_id', 'privacy', 'updated_at', 'like_count', 'comment_count'
+                ).afirst()
+                if row is None:
+                    raise Http404
+                author_id, privacy, *version = row
+                if privacy == 'private' and (not user or author_id != user.id):
+                    return json_response({'detail': 'This post is private.'}, status.HTTP_403_FORBIDDEN)
+                etag = post_etag(pk, *version, pending_likes=await apending_like_count(pk))
+                if etag_matches(request, etag):
+                    return not_modified(etag)
+
+            try:
+                post = await FeedFactory.with_relations(Post.objects.all()).aget(pk=pk)
+            except Post.DoesNotExist:
+                raise Http404
+            if post.privacy == 'private' and (not user or post.author_id != user.id):
+                return json_response({'detail': 'This post is private.'}, status.HTTP_403_FORBIDDEN)
+            etag = post_etag(
+                post.pk, post.updated_at, post.like_count, post.comment_count,
+                pending_likes=await apending_like_count(post.pk)
+            )
+            return with_etag(json_response(PostSerializer(post).data), etag)
+
+        if user:
+            posts = Post.objects.filter(Q(privacy='public') | Q(author=user))
+        else:
+            posts = Post.objects.filter(privacy='public')
+        posts = FeedFactory.with_relations(posts.order_by('-created_at', '-id'))
+        return json_response(await self.paginate(ListCursorPagination(), posts, request))
+
+
+class AsyncUserFollowView(AsyncAPIView):
+
+    async def get(self, request, user_id):
+        try:
+            user = await User.objects.aget(id=user_id)
+        except User.DoesNotExist:
+            raise Http404
+
+        counts = await UserProfile.objects.filter(user=user) \
+            .values_list('follower_count', 'following_count').afirst() or (0, 0)
+        preview = ListCursorPagination.page_size
+        followers = Follow.objects.filter(followed=user).order_by('-created_at', '-id') \
+            .values_list('follower__username', flat=True)[:preview]
+        following = Follow.objects.filter(follower=user).order_by('-created_at', '-id') \
+            .values_list('followed__username', flat=True)[:preview]
+
+        return json_response({
+            "follower_count": counts[0],
+            "following_count": counts[1],
+            "followers": [name async for name in followers],
+            "following": [name async for name in following],
+            "followers_url": request.build_absolute_uri(reverse('user-followers', args=[user.id])),
+            "following_url": request.build_absolute_uri(reverse('user-following', args=[user.id])),
+        })